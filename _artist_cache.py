@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+_artist_cache.py — Persistent on-disk cache for Spotify artist genres.
+
+Artist genres change on the order of weeks, so they are kept in a small
+SQLite database and only re-requested from Spotify once an entry is older
+than ARTIST_CACHE_TTL. Entries read or stored during a run are also kept in
+memory, so repeat exports in one process skip the database as well.
+
+Functions:
+  - get_cached_genres() — Return genres for the artist IDs with a fresh entry
+  - store_genres()      — Save freshly fetched artist genres
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+ARTIST_CACHE_PATH = Path(os.environ.get("SPOTIFY_PINS_ARTIST_CACHE", "artist_cache.sqlite3"))
+ARTIST_CACHE_TTL = 7 * 24 * 3600  # 7 days
+
+MEMORY_CACHE_SIZE = 10000
+
+# Stay well below SQLite's limit on host parameters per statement
+_MAX_PARAMS = 500
+
+# In-process cache (artist ID -> genres), oldest entries evicted first
+_memory_cache: Dict[str, List[str]] = {}
+
+
+def _remember(artist_genres: Dict[str, List[str]]) -> None:
+    _memory_cache.update(artist_genres)
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        del _memory_cache[next(iter(_memory_cache))]
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(ARTIST_CACHE_PATH))
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS artist_genres ("
+        "id TEXT PRIMARY KEY, genres TEXT, fetched_at INTEGER)"
+    )
+    return conn
+
+
+def get_cached_genres(artist_ids: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Look up cached genres for the given artists.
+
+    Args:
+        artist_ids: Spotify artist IDs
+
+    Returns:
+        Dictionary mapping artist IDs to genres, only for entries newer than
+        the TTL. Missing or stale IDs are left out so the caller refetches them.
+    """
+    hits = {}
+    ids = []
+    for artist_id in artist_ids:
+        if artist_id in _memory_cache:
+            hits[artist_id] = _memory_cache[artist_id]
+        else:
+            ids.append(artist_id)
+    if not ids:
+        return hits
+
+    cutoff = int(time.time()) - ARTIST_CACHE_TTL
+    found = {}
+    try:
+        with closing(_connect()) as conn:
+            for i in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[i:i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id, genres FROM artist_genres WHERE fetched_at > ? AND id IN ({placeholders})",
+                    [cutoff, *chunk],
+                )
+                for artist_id, genres in rows:
+                    found[artist_id] = json.loads(genres)
+    except sqlite3.Error as e:
+        print(f"⚠️ Warning: Artist cache unavailable: {e}")
+        return hits
+    _remember(found)
+    hits.update(found)
+    return hits
+
+
+def store_genres(artist_genres: Dict[str, List[str]]) -> None:
+    """
+    Save artist genres to the cache in a single transaction.
+
+    Args:
+        artist_genres: Dictionary mapping artist IDs to genres
+    """
+    if not artist_genres:
+        return
+
+    _remember(artist_genres)
+    now = int(time.time())
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO artist_genres (id, genres, fetched_at) VALUES (?, ?, ?)",
+                [(artist_id, json.dumps(genres), now) for artist_id, genres in artist_genres.items()],
+            )
+    except sqlite3.Error as e:
+        print(f"⚠️ Warning: Could not update artist cache: {e}")
+
@@ -9,22 +9,73 @@ with columns: Artist - Title, Popularity score, Pinned, Genre.
 Functions:
   - export_playlist_to_csv() — Main export function
   - get_track_genres()       — Get genre information for tracks
+  - fetch_batches()          — Fetch several API batches concurrently
   - format_csv_data()        — Format track data for CSV output
 """
 
 import csv
+import itertools
 import sys
-from typing import Dict, List, Optional, Tuple
-from pin import SpotifyClient, load_playlist_config, normalize_track_id
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from pin import (SpotifyClient, get_shared_client, load_playlist_config, normalize_track_id, _json_loads,
+                 MAX_CONCURRENT_REQUESTS)
+from _artist_cache import get_cached_genres, store_genres
 
+# One CSV row: (artist - title, popularity, pinned, genre)
+CsvRow = Tuple[str, int, str, str]
 
-def get_track_genres(sp: SpotifyClient, track_ids: List[str]) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+CSV_HEADER: Tuple[str, str, str, str] = ('Artist - Title', 'Popularity Score', 'Pinned', 'Genre')
+YES_NO: Tuple[str, str] = ('No', 'Yes')  # indexed by bool
+# Large write buffer so the whole export goes out in a few write() calls
+CSV_WRITE_BUFFER = 512 * 1024
+
+
+def _chunks(iterable: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Split an iterable into lists of at most `size` items, without slicing."""
+    it = iter(iterable)
+    return iter(lambda: list(itertools.islice(it, size)), [])
+
+
+def fetch_batches(sp: SpotifyClient, paths: List[str], what: str) -> List[Dict]:
+    """
+    Fetch several GET endpoints concurrently.
+    
+    Args:
+        sp: Spotify client instance
+        paths: API paths to request
+        what: Description used in warnings (e.g. "track details")
+    
+    Returns:
+        List of JSON responses for the requests that succeeded, in request order
+    """
+    def fetch(path: str) -> Optional[Dict]:
+        try:
+            resp = sp._req("GET", path)
+        except Exception as e:
+            print(f"⚠️ Warning: Error getting {what} for batch: {e}")
+            return None
+        if resp.status_code != 200:
+            print(f"⚠️ Warning: Could not get {what}: {resp.status_code}")
+            return None
+        return _json_loads(resp.content)
+
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(paths))) as executor:
+        return [data for data in executor.map(fetch, paths) if data]
+
+
+def get_track_genres(sp: SpotifyClient, track_ids: List[str],
+                     known_tracks: Optional[List[Dict]] = None) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
     """
     Get genre and popularity information for multiple tracks.
     
     Args:
         sp: Spotify client instance
         track_ids: List of track IDs (without spotify:track: prefix)
+        known_tracks: Optional track objects that already include popularity
+            and artist IDs (e.g. from the playlist); these skip the /tracks lookup
     
     Returns:
         Tuple of (genres_dict, popularity_dict) where:
@@ -34,80 +85,69 @@ def get_track_genres(sp: SpotifyClient, track_ids: List[str]) -> Tuple[Dict[str,
     if not track_ids:
         return {}, {}
     
-    # Spotify API allows up to 50 tracks per request
+    # Spotify API allows up to 50 tracks/artists per request
     batch_size = 50
-    all_genres = {}
-    all_popularity = {}
+    all_genres: Dict[str, List[str]] = {}
+    all_popularity: Dict[str, int] = {}
+    
+    # Collect unique artist IDs
+    artist_ids = set()
+    track_artist_map: Dict[str, List[str]] = {}
     
-    for i in range(0, len(track_ids), batch_size):
-        batch = track_ids[i:i + batch_size]
+    def add_track(track: Dict) -> None:
+        # Callers only pass tracks that have an ID
+        track_id: str = track["id"]
+        artists = track.get("artists", [])
+        popularity = track.get("popularity", 0)
         
-        try:
-            # Get track details including artists
-            track_ids_str = ",".join(batch)
-            resp = sp._req("GET", f"/tracks?ids={track_ids_str}")
-            
-            if resp.status_code != 200:
-                print(f"⚠️ Warning: Could not get track details: {resp.status_code}")
-                continue
-            
-            data = resp.json()
-            tracks = data.get("tracks", [])
-            
-            # Collect unique artist IDs
-            artist_ids = set()
-            track_artist_map = {}
-            
-            for track in tracks:
-                if not track:
-                    continue
-                    
-                track_id = track.get("id")
-                artists = track.get("artists", [])
-                popularity = track.get("popularity", 0)
-                
-                track_artist_map[track_id] = [artist.get("id") for artist in artists if artist.get("id")]
-                all_popularity[track_id] = popularity
-                artist_ids.update(track_artist_map[track_id])
-            
-            # Get artist details in batches (50 artists max per request)
-            artist_genres = {}
-            artist_list = list(artist_ids)
-            
-            for j in range(0, len(artist_list), 50):
-                artist_batch = artist_list[j:j + 50]
-                artist_ids_str = ",".join(artist_batch)
-                
-                resp = sp._req("GET", f"/artists?ids={artist_ids_str}")
-                
-                if resp.status_code == 200:
-                    artist_data = resp.json()
-                    for artist in artist_data.get("artists", []):
-                        if artist:
-                            artist_id = artist.get("id")
-                            genres = artist.get("genres", [])
-                            artist_genres[artist_id] = genres
-                else:
-                    print(f"⚠️ Warning: Could not get artist details: {resp.status_code}")
-            
-            # Map track IDs to genres
-            for track_id, artist_ids in track_artist_map.items():
-                track_genres = set()
-                for artist_id in artist_ids:
-                    if artist_id in artist_genres:
-                        track_genres.update(artist_genres[artist_id])
-                all_genres[track_id] = list(track_genres)
-                
-        except Exception as e:
-            print(f"⚠️ Warning: Error getting genres for batch: {e}")
-            continue
+        track_artist_map[track_id] = [artist.get("id") for artist in artists if artist.get("id")]
+        all_popularity[track_id] = popularity
+        artist_ids.update(track_artist_map[track_id])
+    
+    for track in known_tracks or ():
+        if track and track.get("id") and "popularity" in track:
+            add_track(track)
+    # Empty IDs are dropped here, so no batch is ever sent with blank IDs
+    missing_ids = (tid for tid in track_ids if tid and tid not in all_popularity)
+    
+    # Get track details including artists for the rest
+    track_paths = [f"/tracks?ids={','.join(batch)}" for batch in _chunks(missing_ids, batch_size)]
+    
+    for data in fetch_batches(sp, track_paths, "track details"):
+        for track in data.get("tracks", []):
+            # Unavailable tracks come back as null or without an ID
+            if track and track.get("id"):
+                add_track(track)
+    
+    # Use cached genres where fresh, only ask Spotify for the rest
+    artist_genres = get_cached_genres(artist_ids)
+    artist_list = (aid for aid in artist_ids if aid not in artist_genres)
+    
+    artist_paths = [f"/artists?ids={','.join(batch)}" for batch in _chunks(artist_list, batch_size)]
+    
+    fetched = {}
+    for artist_data in fetch_batches(sp, artist_paths, "artist details"):
+        for artist in artist_data.get("artists", []):
+            if artist:
+                artist_id = artist.get("id")
+                genres = artist.get("genres", [])
+                fetched[artist_id] = genres
+    store_genres(fetched)
+    artist_genres.update(fetched)
+    
+    # Map track IDs to genres, deduplicated in artist order
+    chain = itertools.chain.from_iterable
+    for track_id, track_artist_ids in track_artist_map.items():
+        all_genres[track_id] = list(dict.fromkeys(
+            chain(artist_genres.get(artist_id, ()) for artist_id in track_artist_ids)
+        ))
     
     return all_genres, all_popularity
 
 
-def format_csv_data(tracks: List[Dict], pins: List[Dict], genres: Dict[str, List[str]], popularity: Dict[str, int]) -> List[Dict]:
+def format_csv_data(tracks: List[Dict], pins: List[Dict], genres: Dict[str, List[str]], popularity: Dict[str, int]) -> Iterator[CsvRow]:
     """
-    Format track data for CSV export.
+    Format track data for CSV export, one row at a time.
     
     Args:
         tracks: List of track items from Spotify API
@@ -115,45 +155,45 @@ def format_csv_data(tracks: List[Dict], pins: List[Dict], genres: Dict[str, List
         genres: Dictionary mapping track IDs to genres
         popularity: Dictionary mapping track IDs to popularity scores
     
-    Returns:
-        List of formatted track data dictionaries
+    Yields:
+        CSV rows (artist - title, popularity, pinned, genre)
     """
-    # Create a set of pinned track URIs for quick lookup
-    pinned_uris = {normalize_track_id(pin['track_id']) for pin in pins}
+    # Normalize pins once to bare track IDs, so each row is a single set lookup
+    pinned_ids = frozenset(normalize_track_id(pin['track_id']).split(":")[-1] for pin in pins)
+    join = ', '.join
     
-    formatted_data = []
+    # Rows already built, keyed by track ID, for tracks that appear more than once
+    row_cache: Dict[str, CsvRow] = {}
     
     for track_item in tracks:
         track = track_item.get('track', {})
-        track_uri = track_item.get('uri', '')
+        track_id = track.get('id', '')
+        if track_id in row_cache:
+            yield row_cache[track_id]
+            continue
         
         # Extract track information
         track_name = track.get('name', 'Unknown')
-        artists = [artist.get('name', '') for artist in track.get('artists', [])]
-        artist_name = ', '.join(artists) if artists else 'Unknown Artist'
+        artists = track.get('artists')
+        artist_name = join(artist.get('name', '') for artist in artists) if artists else 'Unknown Artist'
         
         # Get popularity from our separate API call
-        track_id = track.get('id', '')
-        track_popularity = popularity.get(track_id, 0)
+        track_popularity: int = popularity.get(track_id, 0)
         
-        # Check if track is pinned
-        is_pinned = track_uri in pinned_uris
+        # Check if track is pinned (local files have no ID and can't be pinned)
+        is_pinned = track_id in pinned_ids
         
         # Get genre information
-        track_genres = genres.get(track_id, [])
-        genre_str = ', '.join(track_genres) if track_genres else 'Unknown'
+        track_genres = genres.get(track_id)
+        genre_str = join(track_genres) if track_genres else 'Unknown'
         
         # Create combined artist-title field
         artist_title = f"{artist_name} - {track_name}"
         
-        formatted_data.append({
-            'artist_title': artist_title,
-            'popularity': track_popularity,
-            'pinned': 'Yes' if is_pinned else 'No',
-            'genre': genre_str
-        })
-    
-    return formatted_data
+        row = (artist_title, track_popularity, YES_NO[is_pinned], genre_str)
+        if track_id:
+            row_cache[track_id] = row
+        yield row
 
 
 def export_playlist_to_csv(playlist_name: str, output_file: Optional[str] = None) -> bool:
@@ -179,20 +219,34 @@ def export_playlist_to_csv(playlist_name: str, output_file: Optional[str] = None
     
     # Get Spotify client
     try:
-        sp = SpotifyClient()
+        sp = get_shared_client()
     except Exception as e:
         print(f"❌ Failed to initialize Spotify client: {e}")
         return False
     
-    # Get playlist tracks
+    # Get playlist tracks page by page; genres for each page are fetched in
+    # the background while the next page loads
     print("📡 Loading tracks from Spotify...")
-    try:
-        tracks, _ = sp.get_playlist_items(playlist_id)
-        if not tracks:
-            print("❌ No tracks found in playlist!")
+    tracks = []
+    seen_ids = set()
+    genre_jobs = []
+    with ThreadPoolExecutor(max_workers=1) as genre_executor:
+        try:
+            for page in sp.iter_playlist_items(playlist_id):
+                tracks.extend(page)
+                page_tracks = [track_item.get('track', {}) for track_item in page]
+                # Filter out empty IDs and tracks already seen, keeping playlist order
+                page_ids = (track.get('id', '') for track in page_tracks)
+                new_ids = list(dict.fromkeys(tid for tid in page_ids if tid and tid not in seen_ids))
+                if new_ids:
+                    seen_ids.update(new_ids)
+                    genre_jobs.append(genre_executor.submit(get_track_genres, sp, new_ids, page_tracks))
+        except Exception as e:
+            print(f"❌ Failed to load playlist tracks: {e}")
             return False
-    except Exception as e:
-        print(f"❌ Failed to load playlist tracks: {e}")
+    
+    if not tracks:
+        print("❌ No tracks found in playlist!")
         return False
     
     # Get pinned tracks
@@ -201,20 +255,17 @@ def export_playlist_to_csv(playlist_name: str, output_file: Optional[str] = None
     
     # Get genre information
     print("🎵 Getting genre information...")
-    track_ids = [track_item.get('track', {}).get('id', '') for track_item in tracks]
-    track_ids = [tid for tid in track_ids if tid]  # Filter out empty IDs
-    
-    try:
-        genres, popularity_data = get_track_genres(sp, track_ids)
-        print(f"✅ Retrieved genres and popularity for {len(genres)} tracks")
-    except Exception as e:
-        print(f"⚠️ Warning: Could not get all genre/popularity information: {e}")
-        genres = {}
-        popularity_data = {}
-    
-    # Format data for CSV
-    print("📝 Formatting data...")
-    csv_data = format_csv_data(tracks, pins, genres, popularity_data)
+    genres = {}
+    popularity_data = {}
+    for job in genre_jobs:
+        try:
+            page_genres, page_popularity = job.result()
+        except Exception as e:
+            print(f"⚠️ Warning: Could not get all genre/popularity information: {e}")
+            continue
+        genres.update(page_genres)
+        popularity_data.update(page_popularity)
+    print(f"✅ Retrieved genres and popularity for {len(genres)} tracks")
     
     # Determine output file
     if not output_file:
@@ -223,20 +274,13 @@ def export_playlist_to_csv(playlist_name: str, output_file: Optional[str] = None
     # Write CSV file
     print(f"💾 Writing to {output_file}...")
     try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Artist - Title', 'Popularity Score', 'Pinned', 'Genre']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for row in csv_data:
-                writer.writerow({
-                    'Artist - Title': row['artist_title'],
-                    'Popularity Score': row['popularity'],
-                    'Pinned': row['pinned'],
-                    'Genre': row['genre']
-                })
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_HEADER)
+            # Rows are formatted as they are written
+            writer.writerows(format_csv_data(tracks, pins, genres, popularity_data))
         
-        print(f"✅ Successfully exported {len(csv_data)} tracks to {output_file}")
+        print(f"✅ Successfully exported {len(tracks)} tracks to {output_file}")
         return True
         
     except Exception as e:
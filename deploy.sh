@@ -117,9 +117,10 @@ systemctl daemon-reload
 systemctl enable "$APP_NAME.service"
 
 # Create log rotation configuration
+# spotify_pins.log is left out: pin.py rotates it itself (5 MB x 3)
 echo -e "${YELLOW}📋 Setting up log rotation...${NC}"
 cat > "/etc/logrotate.d/$APP_NAME" << EOF
-$LOG_DIR/*.log {
+$LOG_DIR/cron.log $LOG_DIR/service.log {
     daily
     missingok
     rotate 30
@@ -147,6 +148,6 @@ echo "3. Run a manual sync to test:"
 echo "   sudo -u $SERVICE_USER $APP_DIR/venv/bin/python $APP_DIR/pin.py sync"
 echo ""
 echo "4. Check logs:"
-echo "   tail -f $LOG_DIR/spotify_pins.log"
+echo "   tail -F $LOG_DIR/spotify_pins.log"
 echo ""
 echo -e "${GREEN}🎉 Your Spotify Playlist Manager is now deployed and will sync daily at 22:00 Sofia time!${NC}"
@@ -7,8 +7,8 @@ Run this once to get your refresh token, then use it in the main script.
 import os
 import webbrowser
 import urllib.parse
-import urllib.request
-import json
+
+import requests  # pyright: ignore[reportMissingModuleSource]
 
 def get_refresh_token():
     client_id = input("Enter your Spotify CLIENT_ID: ").strip()
@@ -45,14 +45,11 @@ def get_refresh_token():
         "client_secret": client_secret
     }
     
-    req = urllib.request.Request(token_url, data=urllib.parse.urlencode(data).encode())
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
-    
     try:
-        with urllib.request.urlopen(req) as response:
-            response_data = response.read().decode()
-            token_data = json.loads(response_data)
-            
+        resp = requests.post(token_url, data=data, timeout=30)
+        resp.raise_for_status()
+        token_data = resp.json()
+        
         print("\n✅ Success! Here are your tokens:")
         print(f"ACCESS_TOKEN: {token_data['access_token']}")
         print(f"REFRESH_TOKEN: {token_data['refresh_token']}")
@@ -63,9 +60,8 @@ def get_refresh_token():
         print(f"$env:SPOTIFY_CLIENT_SECRET=\"{client_secret}\"")
         print(f"$env:SPOTIFY_REFRESH_TOKEN=\"{token_data['refresh_token']}\"")
         
-    except urllib.error.HTTPError as e:
-        error_response = e.read().decode()
-        print(f"❌ HTTP Error {e.code}: {error_response}")
+    except requests.HTTPError:
+        print(f"❌ HTTP Error {resp.status_code}: {resp.text}")
         print(f"Request data: {data}")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -34,51 +34,59 @@ Cron example (Sofia 22:00):
 """
 
 import argparse
+import bisect
+import functools
+import hashlib
 import json
 import logging
 import os
+import random
 import re
 import sys
+import threading
 import time
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import requests  # pyright: ignore[reportMissingModuleSource]
+from requests.adapters import HTTPAdapter  # pyright: ignore[reportMissingModuleSource]
 
-# Import track selection functionality
+# Use orjson for faster config and API response parsing when it is installed
 try:
-    from track_select import track_select
-except ImportError:
-    track_select = None
+    import orjson
+    _json_loads = orjson.loads
 
-# Import track search functionality
-try:
-    from track_search import track_search
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
 except ImportError:
-    track_search = None
+    _json_loads = json.loads  # type: ignore[assignment]
 
-# Import CSV export functionality
-try:
-    from csv_export import export_playlist_to_csv
-except ImportError:
-    export_playlist_to_csv = None
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+# KEY=value; comment and blank lines don't match
+ENV_LINE_RX = re.compile(r"\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)\s*")
 
 def load_env_file():
     """Load environment variables from .env file if it exists."""
     env_file = Path(".env")
     if env_file.exists():
-        with env_file.open("r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip()
+        matches = map(ENV_LINE_RX.fullmatch, env_file.read_text().splitlines())
+        os.environ.update(m.groups() for m in matches if m)
 
 # Load environment variables from .env file
 load_env_file()
 
 PLAYLISTS_REGISTRY = Path("playlists.json")
+TOKEN_CACHE = Path(".spotify_token.json")
+ME_PLAYLISTS_CACHE = Path(".spotify_me_playlists_cache.json")
+ME_PLAYLISTS_CACHE_TTL = 10 * 60  # seconds
 DEFAULT_LOG_PATH = os.environ.get("SPOTIFY_PINS_LOG", "spotify_pins.log")
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 3
 
 # ---------- Logging ----------
 logger = logging.getLogger("spotify_pins")
@@ -87,8 +95,10 @@ logger = logging.getLogger("spotify_pins")
 if not logger.handlers:
     logger.setLevel(logging.INFO)
 
-    # File handler for logging to file
-    file_handler = logging.FileHandler(DEFAULT_LOG_PATH, encoding='utf-8')
+    # File handler for logging to file; the file is opened on the first record
+    # and rotated at 5 MB so cron runs can't grow it without bound
+    file_handler = RotatingFileHandler(DEFAULT_LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                       encoding='utf-8', delay=True)
     file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
     logger.addHandler(file_handler)
 
@@ -108,14 +118,32 @@ SPOTIFY_ID_RX = re.compile(r"(?:spotify:(?:track|playlist):)?([A-Za-z0-9]{22})")
 TRACK_URL_RX = re.compile(r"open\.spotify\.com/track/([A-Za-z0-9]{22})")
 PLAYLIST_URL_RX = re.compile(r"open\.spotify\.com/playlist/([A-Za-z0-9]{22})")
 
+# Anything but letters/digits (any script), space, '-' and '_'
+UNSAFE_NAME_CHARS_RX = re.compile(r"[^\w \-]")
+
+def safe_playlist_name(playlist_name: str) -> str:
+    """Config-file-safe name: unsafe characters dropped, spaces to '_', lowercase."""
+    return UNSAFE_NAME_CHARS_RX.sub("", playlist_name).rstrip().replace(" ", "_").lower()
+
+def _is_canonical(s: str, prefix: str) -> bool:
+    """True if s is already '<prefix><22-char id>', so no regex is needed."""
+    return len(s) == len(prefix) + 22 and s.startswith(prefix) and s[len(prefix):].isascii() and s[len(prefix):].isalnum()
+
+# Pure functions called repeatedly on the same pin IDs — cache the results
+@functools.lru_cache(maxsize=4096)
 def normalize_track_id(s: str) -> str:
+    if _is_canonical(s, "spotify:track:"):
+        return s
     s = s.strip()
     m = TRACK_URL_RX.search(s) or SPOTIFY_ID_RX.search(s)
     if not m:
         raise ValueError(f"Cannot recognize track_id from: {s}")
     return f"spotify:track:{m.group(1)}"
 
+@functools.lru_cache(maxsize=4096)
 def normalize_playlist_id(s: str) -> str:
+    if _is_canonical(s, "spotify:playlist:"):
+        return s
     s = s.strip()
     m = PLAYLIST_URL_RX.search(s) or SPOTIFY_ID_RX.search(s)
     if not m:
@@ -123,17 +151,28 @@ def normalize_playlist_id(s: str) -> str:
     return f"spotify:playlist:{m.group(1)}"
 
 
+def _read_json(path: Path):
+    """Parsed JSON file, decoded from the raw bytes."""
+    return _json_loads(path.read_bytes())
+
+def _write_atomic(path: Path, data: bytes):
+    """Write a file so readers see either the old or the new contents, never a partial one."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
 def load_playlists_registry() -> Dict:
     """Load the playlists registry that tracks all managed playlists."""
     if not PLAYLISTS_REGISTRY.exists():
         return {"playlists": {}, "default": None}
-    with PLAYLISTS_REGISTRY.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return _read_json(PLAYLISTS_REGISTRY)
 
 def save_playlists_registry(registry: Dict):
     """Save the playlists registry."""
-    with PLAYLISTS_REGISTRY.open("w", encoding="utf-8") as f:
-        json.dump(registry, f, ensure_ascii=False, indent=2)
+    _write_atomic(PLAYLISTS_REGISTRY, _json_dumps(registry))
     logger.info("✅ Playlists registry saved: %s", PLAYLISTS_REGISTRY)
 
 def get_playlist_config_path(playlist_name: str) -> Path:
@@ -145,8 +184,15 @@ def load_playlist_config(playlist_name: str) -> Dict:
     config_path = get_playlist_config_path(playlist_name)
     if not config_path.exists():
         return {"timezone": "Europe/Sofia", "playlist_name": playlist_name, "pins": []}
-    with config_path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    config = _read_json(config_path)
+    # hand-edited configs may have string positions; callers can rely on ints
+    for pin in config.get("pins", []):
+        pin["position"] = int(pin["position"])
+    return config
+
+def pins_by_position(config: Dict) -> Dict[int, Dict]:
+    """Pins keyed by position, for O(1) replace; store back with list(pins.values())."""
+    return {pin["position"]: pin for pin in config.get("pins", [])}
 
 def save_playlist_config(playlist_name: str, config: Dict):
     """Save configuration for a specific playlist."""
@@ -155,15 +201,26 @@ def save_playlist_config(playlist_name: str, config: Dict):
         config["pins"] = sorted(config["pins"], key=lambda pin: int(pin.get("position", 0)))
     
     config_path = get_playlist_config_path(playlist_name)
-    with config_path.open("w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    _write_atomic(config_path, _json_dumps(config))
     logger.info("✅ Playlist config saved: %s", config_path)
 
 
 # ---------- Spotify API Client ----------
 
+PLAYLIST_PAGE_SIZE = 100   # Spotify maximum for playlist items
+PLAYLIST_PAGE_WORKERS = 8  # pages fetched in parallel after the first one
+# Concurrent batch requests (csv_export), kept low to stay clear of Spotify's rate limit
+MAX_CONCURRENT_REQUESTS = 8
+# export-csv fetches playlist pages and track/artist batches at the same time
+HTTP_POOL_SIZE = PLAYLIST_PAGE_WORKERS + MAX_CONCURRENT_REQUESTS
+RETRY_MAX_DELAY = 30.0     # seconds; Spotify's rate limit is a rolling 30-second window
+
 class SpotifyClient:
     BASE = "https://api.spotify.com/v1"
+    # Shared by all clients so parallel syncs don't all refresh the token at once
+    _token_lock = threading.Lock()
+    # Shared by all clients: no request is sent before this time after a 429
+    _next_ok_time = 0.0
 
     def __init__(self):
         self.client_id = os.environ.get("SPOTIFY_CLIENT_ID")
@@ -171,11 +228,30 @@ class SpotifyClient:
         self.refresh_token = os.environ.get("SPOTIFY_REFRESH_TOKEN")
         if not all([self.client_id, self.client_secret, self.refresh_token]):
             die("Need to set ENV: SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_REFRESH_TOKEN")
+        # Identifies the Spotify account (set by the refresh token) in on-disk caches
+        self.account_key = hashlib.sha256(self.refresh_token.encode("utf-8")).hexdigest()
         self._access_token = None
         self._token_exp = 0
+        self._load_cached_token()
+        # Shared session: keeps HTTPS connections alive between requests.
+        # Pool size covers every request that can be in flight at once, so no
+        # connection is opened only to be thrown away.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE))
+
+    def _refresh_access_token(self, stale_token: Optional[str]):
+        """Replace stale_token (expired or rejected by Spotify), unless someone already did."""
+        with SpotifyClient._token_lock:
+            # Another thread of this client, or another client or run, may have
+            # refreshed the token while we waited for the lock
+            if self._access_token == stale_token:
+                self._load_cached_token()
+            if self._access_token != stale_token and time.time() < self._token_exp:
+                return
+            self._request_access_token()
 
-    def _refresh_access_token(self):
-        resp = requests.post(
+    def _request_access_token(self):
+        resp = self.session.post(
             "https://accounts.spotify.com/api/token",
             data={
                 "grant_type": "refresh_token",
@@ -190,26 +266,62 @@ class SpotifyClient:
         data = resp.json()
         self._access_token = data["access_token"]
         self._token_exp = time.time() + int(data.get("expires_in", 3600)) - 60
+        self._save_cached_token()
+
+    def _load_cached_token(self):
+        """Reuse an access token saved by a previous run (same client and account only)."""
+        try:
+            with TOKEN_CACHE.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("client_id") == self.client_id and data.get("account") == self.account_key:
+                self._access_token = data["access_token"]
+                self._token_exp = float(data["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _save_cached_token(self):
+        """Save the access token so the next run can skip the token request."""
+        data = {"client_id": self.client_id, "account": self.account_key,
+                "access_token": self._access_token, "expires_at": self._token_exp}
+        try:
+            # Token is a credential: readable by the owner only
+            fd = os.open(TOKEN_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.chmod(TOKEN_CACHE, 0o600)
+        except OSError as e:
+            logger.warning("Could not cache access token: %s", e)
 
     def _headers(self):
-        if not self._access_token or time.time() > self._token_exp:
-            self._refresh_access_token()
+        token = self._access_token
+        if not token or time.time() > self._token_exp:
+            self._refresh_access_token(token)
         return {"Authorization": f"Bearer {self._access_token}", "Content-Type": "application/json"}
 
     def _req(self, method: str, path: str, **kwargs):
         url = f"{self.BASE}{path}"
         for attempt in range(5):
-            resp = requests.request(method, url, headers=self._headers(), timeout=60, **kwargs)
+            # another thread may have hit the rate limit: wait until it's lifted
+            wait = SpotifyClient._next_ok_time - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            headers = self._headers()
+            resp = self.session.request(method, url, headers=headers, timeout=60, **kwargs)
             if resp.status_code == 429:
-                retry = int(resp.headers.get("Retry-After", "1"))
+                try:
+                    retry = float(resp.headers["Retry-After"])
+                except (KeyError, ValueError):
+                    retry = min(RETRY_MAX_DELAY, 2 ** attempt)
+                retry += random.uniform(0, 0.25 * retry)
+                SpotifyClient._next_ok_time = max(SpotifyClient._next_ok_time, time.time() + retry)
                 time.sleep(retry)
                 continue
             if resp.status_code in (500, 502, 503, 504):
-                time.sleep(1 + attempt)
+                time.sleep(min(RETRY_MAX_DELAY, 2 ** attempt + random.random()))
                 continue
             if resp.status_code == 401:
-                # try to refresh token
-                self._refresh_access_token()
+                # try to refresh the token this request was sent with
+                self._refresh_access_token(headers["Authorization"].split(" ", 1)[1])
                 continue
             return resp
         return resp
@@ -217,8 +329,11 @@ class SpotifyClient:
     # --- API helpers ---
 
     def me_playlists(self, limit=50) -> List[Dict]:
+        cached = self._load_me_playlists_cache(limit)
+        if cached is not None:
+            return cached
         items = []
-        url = f"/me/playlists?limit={limit}"
+        url: Optional[str] = f"/me/playlists?limit={limit}"
         while url:
             resp = self._req("GET", url)
             if resp.status_code != 200:
@@ -229,14 +344,55 @@ class SpotifyClient:
             if data.get("next"):
                 # next — absolute URL; extract base
                 url = data["next"].replace(self.BASE, "")
+        self._save_me_playlists_cache(limit, items)
         return items
 
+    def _load_me_cache(self) -> Dict:
+        """Return the cached /me data (user ID, playlists list) if it is for this account."""
+        try:
+            with ME_PLAYLISTS_CACHE.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("account") == self.account_key:
+                return data
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return {"account": self.account_key}
+
+    def _save_me_cache(self, data: Dict):
+        """Save the /me data of this account; it replaces any other account's entry."""
+        try:
+            with ME_PLAYLISTS_CACHE.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning("Could not cache account data: %s", e)
+
+    def _load_me_playlists_cache(self, limit: int) -> Optional[List[Dict]]:
+        """Return the cached /me/playlists list if it is fresh and for this account."""
+        try:
+            cached = self._load_me_cache()["playlists"]
+            if cached["limit"] == limit and time.time() - float(cached["fetched_at"]) < ME_PLAYLISTS_CACHE_TTL:
+                return cached["items"]
+        except (KeyError, ValueError, TypeError):
+            pass
+        return None
+
+    def _save_me_playlists_cache(self, limit: int, items: List[Dict]):
+        """Save the /me/playlists list so commands in the next few minutes skip it."""
+        data = self._load_me_cache()
+        data["playlists"] = {"limit": limit, "fetched_at": time.time(), "items": items}
+        self._save_me_cache(data)
+
     def get_my_user_id(self) -> str:
-        """Get the current user's Spotify ID."""
+        """Get the current user's Spotify ID (cached per account, it never changes)."""
+        data = self._load_me_cache()
+        if data.get("user_id"):
+            return data["user_id"]
         resp = self._req("GET", "/me")
         if resp.status_code != 200:
             die(f"Error getting user info: {resp.status_code} {resp.text}")
-        return resp.json()["id"]
+        data["user_id"] = resp.json()["id"]
+        self._save_me_cache(data)
+        return data["user_id"]
 
     def my_owned_playlists(self, limit=50) -> List[Dict]:
         """Get only playlists owned by the current user."""
@@ -244,44 +400,86 @@ class SpotifyClient:
         all_playlists = self.me_playlists(limit)
         return [p for p in all_playlists if p.get("owner", {}).get("id") == my_id]
 
-    def get_playlist(self, playlist_id: str) -> Dict:
+    def get_tracks(self, spotify_ids: List[str]) -> Dict[str, Dict]:
+        """Returns {id: track} for bare track IDs, fetched 50 per request."""
+        tracks = {}
+        ids = list(dict.fromkeys(spotify_ids))
+        for i in range(0, len(ids), 50):
+            chunk = ids[i:i + 50]
+            resp = self._req("GET", f"/tracks?ids={','.join(chunk)}")
+            if resp.status_code != 200:
+                logger.warning("Error reading tracks: %s %s", resp.status_code, resp.text)
+                continue
+            for tr in _json_loads(resp.content).get("tracks", []):
+                if tr and tr.get("id"):
+                    tracks[tr["id"]] = tr
+        return tracks
+
+    def get_playlist(self, playlist_id: str, fields: Optional[str] = None) -> Dict:
         pid = normalize_playlist_id(playlist_id).split(":")[-1]
-        resp = self._req("GET", f"/playlists/{pid}")
+        resp = self._req("GET", f"/playlists/{pid}" + (f"?fields={fields}" if fields else ""))
         if resp.status_code != 200:
             die(f"Error reading playlist: {resp.status_code} {resp.text}")
         return resp.json()
 
-    def get_playlist_items(self, playlist_id: str) -> Tuple[List[Dict], str]:
-        """Returns (list of items, snapshot_id). Each item: { 'track': {...}, 'uri': 'spotify:track:...' }"""
+    def _iter_playlist_pages(self, playlist_id: str, fields: str) -> Iterator[Tuple[int, Dict]]:
+        """Yields (offset, raw page) in playlist order, asking only for the given fields.
+
+        The first page reveals the total, so the remaining pages are then fetched in parallel.
+        """
         pid = normalize_playlist_id(playlist_id).split(":")[-1]
-        items = []
-        url = f"/playlists/{pid}/tracks?limit=100&fields=items(track(uri,id,name,artists(name))),next,snapshot_id,total"
-        snapshot_id = None
-        while url:
-            resp = self._req("GET", url)
+
+        def fetch_page(offset: int) -> Dict:
+            resp = self._req("GET", f"/playlists/{pid}/tracks?offset={offset}&limit={PLAYLIST_PAGE_SIZE}&fields={fields},total")
             if resp.status_code != 200:
                 die(f"Error reading tracks: {resp.status_code} {resp.text}")
-            data = resp.json()
-            if snapshot_id is None:
-                snapshot_id = data.get("snapshot_id")
-            items.extend(data.get("items", []))
-            url = data.get("next")
-            if url:
-                url = url.replace(self.BASE, "")
-        # normalize
-        norm = []
-        for it in items:
-            tr = it.get("track") or {}
-            uri = tr.get("uri")
-            if not uri:
-                # local tracks etc. — skip
-                continue
-            norm.append({"track": tr, "uri": uri})
-        return norm, snapshot_id
+            # playlist pages are the largest responses; decode the raw bytes directly
+            return _json_loads(resp.content)
+
+        first = fetch_page(0)
+        yield 0, first
+        offsets = range(PLAYLIST_PAGE_SIZE, int(first.get("total") or 0), PLAYLIST_PAGE_SIZE)
+        if not offsets:
+            return
+        with ThreadPoolExecutor(max_workers=min(PLAYLIST_PAGE_WORKERS, len(offsets))) as executor:
+            # map() keeps pages in offset order
+            yield from zip(offsets, executor.map(fetch_page, offsets))
+
+    def iter_playlist_items(self, playlist_id: str) -> Iterator[List[Dict]]:
+        """Yields pages of items in playlist order. Items as in get_playlist_items()."""
+        fields = "items(track(uri,id,name,popularity,duration_ms,artists(id,name)))"
+        for offset, data in self._iter_playlist_pages(playlist_id, fields):
+            norm = []
+            for i, it in enumerate(data.get("items", []), offset):
+                tr = it.get("track") or {}
+                uri = tr.get("uri")
+                if not uri:
+                    # unavailable tracks etc. — skip
+                    continue
+                norm.append({"track": tr, "uri": uri, "position": i})
+            yield norm
+
+    def get_playlist_uris(self, playlist_id: str) -> List[Optional[str]]:
+        """Returns the uri of every item, fetching nothing but the URIs.
+
+        List index == playlist position; unavailable tracks are None so positions stay exact.
+        The track pages carry no snapshot_id; use get_playlist(fields="snapshot_id") for it.
+        """
+        uris: List[Optional[str]] = []
+        for offset, data in self._iter_playlist_pages(playlist_id, "items(track(uri))"):
+            uris.extend((it.get("track") or {}).get("uri") for it in data.get("items", []))
+        return uris
+
+    def get_playlist_items(self, playlist_id: str) -> List[Dict]:
+        """Returns a list of items. Each item: { 'track': {...}, 'uri': 'spotify:track:...', 'position': 0-based index }"""
+        items = []
+        for page in self.iter_playlist_items(playlist_id):
+            items.extend(page)
+        return items
 
     def add_tracks(self, playlist_id: str, uris: List[str], position: Optional[int] = None) -> str:
         pid = normalize_playlist_id(playlist_id).split(":")[-1]
-        payload = {"uris": uris}
+        payload: Dict[str, Any] = {"uris": uris}
         if position is not None:
             payload["position"] = position
         resp = self._req("POST", f"/playlists/{pid}/tracks", json=payload)
@@ -291,7 +489,7 @@ class SpotifyClient:
 
     def reorder(self, playlist_id: str, range_start: int, insert_before: int, range_length: int, snapshot_id: Optional[str] = None) -> str:
         pid = normalize_playlist_id(playlist_id).split(":")[-1]
-        payload = {
+        payload: Dict[str, Any] = {
             "range_start": range_start,
             "insert_before": insert_before,
             "range_length": range_length,
@@ -312,121 +510,213 @@ class SpotifyClient:
             die(f"Error removing tracks: {resp.status_code} {resp.text}")
         return resp.json()["snapshot_id"]
 
+    def remove_occurrences(self, playlist_id: str, positions_by_uri: Dict[str, List[int]], snapshot_id: Optional[str] = None) -> str:
+        """Removes specific occurrences of tracks by their 0-based positions (e.g. duplicate copies)."""
+        pid = normalize_playlist_id(playlist_id).split(":")[-1]
+        entries = [{"uri": u, "positions": sorted(p)} for u, p in positions_by_uri.items()]
+        # Spotify accepts at most 100 tracks per request; positions refer to snapshot_id
+        for i in range(0, len(entries), 100):
+            payload: Dict[str, Any] = {"tracks": entries[i:i + 100]}
+            if snapshot_id:
+                payload["snapshot_id"] = snapshot_id
+            resp = self._req("DELETE", f"/playlists/{pid}/tracks", json=payload)
+            if resp.status_code != 200:
+                die(f"Error removing tracks: {resp.status_code} {resp.text}")
+            new_snapshot_id = resp.json()["snapshot_id"]
+        return new_snapshot_id
+
+@functools.lru_cache(maxsize=1)
+def get_shared_client() -> SpotifyClient:
+    """One Spotify client per process, so interactive sessions keep their connections warm."""
+    return SpotifyClient()
+
 # ---------- Domain Operations ----------
 
-def ensure_no_duplicates(sp: SpotifyClient, playlist_id: str) -> None:
-    items, snap = sp.get_playlist_items(playlist_id)
+def track_display_name(track: Dict) -> str:
+    """Pin display name for a Spotify track object: 'Title - Artist, Artist'."""
+    track_name = track.get("name", "Unknown")
+    artists = ", ".join(artist.get("name", "") for artist in track.get("artists", ()))
+    return f"{track_name} - {artists}" if artists else track_name
+
+def backfill_track_names(sp: SpotifyClient, playlist_name: str, config: Dict) -> None:
+    """Fills in missing pin track names with one batched lookup and saves the config."""
+    missing = [p for p in config.get("pins", []) if "track_name" not in p]
+    if not missing:
+        return
+    tracks = sp.get_tracks([normalize_track_id(p["track_id"]).split(":")[-1] for p in missing])
+    for p in missing:
+        track_data = tracks.get(normalize_track_id(p["track_id"]).split(":")[-1])
+        p["track_name"] = track_display_name(track_data) if track_data else "Unknown Track"
+    save_playlist_config(playlist_name, config)
+    logger.info("backfill: %s: named %d pins", playlist_name, len(missing))
+
+def ensure_no_duplicates(sp: SpotifyClient, playlist_id: str, snapshot_id: Optional[str],
+                         playlist_name: str = "unknown") -> Tuple[List[Optional[str]], Optional[str]]:
+    """Keeps the first copy of every track and removes the rest in one request, preserving order.
+
+    snapshot_id is the playlist version the read is based on; the positional removal is sent
+    against it. Returns the resulting (uris as in get_playlist_uris(), snapshot_id), so callers
+    need not re-read.
+    """
+    uris = sp.get_playlist_uris(playlist_id)
+    snap = snapshot_id
     seen = set()
-    dups = []
-    for idx, it in enumerate(items):
-        uri = it["uri"]
+    extras = defaultdict(list)  # uri -> positions of every copy after the first
+    for position, uri in enumerate(uris):
+        if uri is None:
+            continue
         if uri in seen:
-            dups.append(uri)
+            extras[uri].append(position)
         else:
             seen.add(uri)
-    if dups:
-        sp.remove_all_occurrences(playlist_id, list(set(dups)))
-        # return first occurrences? Not needed: we removed all, including the first.
-        # So we'll add back ONE copy of each unique track from seen in original order.
-        # To not lose order, re-read playlist (now it's without removed ones)
-        # and we won't ADD — that would shift order. Instead
-        # simpler to remove only extra copies, keeping the first:
-        # Rewrite more correctly: remove by positions all repeated occurrences.
-        # ---- Rewriting correctly:
-        # 1) Read all items again
-        items2, _ = sp.get_playlist_items(playlist_id)
-        # 2) Collect positions of repeats (second+)
-        first_seen = {}
-        remove_positions = []
-        for i, it2 in enumerate(items2):
-            uri = it2["uri"]
-            if uri not in first_seen:
-                first_seen[uri] = i
-            else:
-                remove_positions.append((uri, i))
-        if remove_positions:
-            # Spotify API doesn't remove by index; already removed all occurrences above — so rollback:
-            # Simple correct approach: go through original list again and remove specific "extra" by URI,
-            # but that way we'll lose the first. To avoid complexity — implement cleanup by URI without removing first:
-            # Solution: remove all URIs (as above), then add back exactly one copy each in first_seen order.
-            unique_order = sorted(first_seen.items(), key=lambda kv: kv[1])
-            sp.remove_all_occurrences(playlist_id, [u for u, _ in unique_order])  # remove all
-            sp.add_tracks(playlist_id, [u for u, _ in unique_order], position=None)  # add one copy each
-            logger.info("remove-dup: reduced to one copy, unique count=%d", len(unique_order))
-        else:
-            logger.info("remove-dup: no duplicates found after second check")
+    if extras:
+        snap = sp.remove_occurrences(playlist_id, extras, snapshot_id=snap)
+        removed = {p for positions in extras.values() for p in positions}
+        uris = [uri for position, uri in enumerate(uris) if position not in removed]
+        logger.info("remove-dup: %s: removed %d extra copies, unique count=%d", playlist_name, len(removed), len(seen))
     else:
-        logger.info("remove-dup: no duplicates")
-
-def sync_playlist_new(sp: SpotifyClient, config: Dict):
-    """Applies pins to one playlist using the new config format. Top to bottom."""
+        logger.info("remove-dup: %s: no duplicates", playlist_name)
+    return uris, snap
+
+def _increasing_subsequence(values: List[int]) -> set:
+    """Indices of one longest strictly increasing subsequence of values (O(n log n))."""
+    tails: List[int] = []       # tails[k] = index of the smallest tail of a run of length k+1
+    tail_values: List[int] = []  # values[tails[k]], kept sorted for bisect
+    prev: List[int] = [-1] * len(values)
+    for i, v in enumerate(values):
+        k = bisect.bisect_left(tail_values, v)
+        if k:
+            prev[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(v)
+        else:
+            tails[k] = i
+            tail_values[k] = v
+    keep = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        keep.add(i)
+        i = prev[i]
+    return keep
+
+def pins_hash(config: Dict) -> str:
+    """Fingerprint of what a sync applies: the playlist and its (position, track) pins."""
+    pins = sorted((int(p["position"]), normalize_track_id(p["track_id"])) for p in config.get("pins", []))
+    return hashlib.sha1(json.dumps([config.get("playlist_id"), pins]).encode("utf-8")).hexdigest()
+
+def sync_playlist_new(sp: SpotifyClient, config: Dict) -> Optional[str]:
+    """Applies pins to one playlist using the new config format. Returns the resulting snapshot_id.
+
+    The final order is computed up front; it is then applied either by removing the pinned
+    tracks and re-adding them in a few batched inserts, or by moving only the out-of-place
+    tracks one by one — whichever takes fewer requests.
+    """
     playlist_id = config["playlist_id"]
     playlist_name = config.get("playlist_name", "unknown")
 
-    # 1) remove duplicates (exactly one copy of each track in the end)
-    ensure_no_duplicates(sp, playlist_id)
-
-    # 2) go through pins in ascending position order
-    pins = sorted(config.get("pins", []), key=lambda p: int(p["position"]))
-    for pin in pins:
-        uri = normalize_track_id(pin["track_id"])
-        target_pos_1based = int(pin["position"])
-        
-        # Get current playlist state (refresh after each modification)
-        items, snapshot = sp.get_playlist_items(playlist_id)
-        uris = [it["uri"] for it in items]
-        
-        # helper: find track index (first occurrence) or None
-        def find_index(uri: str) -> Optional[int]:
-            try:
-                return uris.index(uri)
-            except ValueError:
-                return None
-
-        # convert to 0-based insert_before
-        insert_before = max(0, target_pos_1based - 1)
-        current_idx = find_index(uri)
-        n = len(uris)
-
-        # if position > len+1 -> insert at end
-        if target_pos_1based > n + (0 if current_idx is not None else 1):
-            insert_before = n  # end
-
-        if current_idx is None:
-            # not in playlist -> add
-            snapshot = sp.add_tracks(playlist_id, [uri], position=insert_before if insert_before <= n else None)
-            logger.info("insert: %s -> pos %d", uri, (insert_before + 1 if insert_before <= n else n + 1))
+    # 0) current version of the playlist: every write below is based on it, and
+    #    there is nothing to do if neither it nor the pins changed since the last sync
+    snapshot = sp.get_playlist(playlist_id, fields="snapshot_id").get("snapshot_id")
+    last_sync = config.get("last_sync") or {}
+    if snapshot and last_sync.get("snapshot_id") == snapshot and last_sync.get("config_hash") == pins_hash(config):
+        logger.info("skip: %s unchanged since last sync", playlist_name)
+        return snapshot
+
+    # 1) read the playlist once and remove duplicates (exactly one copy of each track in the end)
+    uris, snapshot = ensure_no_duplicates(sp, playlist_id, snapshot, playlist_name)
+    n = len(uris)
+    # track index by uri (unique after dedupe)
+    pos: Dict[str, int] = {u: i for i, u in enumerate(uris) if u is not None}
+
+    # 2) desired order: unpinned tracks keep their order, pins go in ascending position
+    #    order to their target (position > current length -> end). Entries are current
+    #    indices for tracks already in the playlist, uris for tracks to add.
+    pins = [(int(p["position"]), normalize_track_id(p["track_id"])) for p in config.get("pins", [])]
+    pins.sort(key=lambda p: p[0])
+    pinned: Dict[str, int] = {}
+    for position, uri in pins:
+        pinned.setdefault(uri, position)
+    desired: List = [i for i in range(n) if uris[i] not in pinned]
+    for uri, position in pinned.items():
+        desired.insert(min(max(0, position - 1), len(desired)), pos.get(uri, uri))
+
+    if desired == list(range(n)):
+        logger.info("skip: %s: all %d pins already in place", playlist_name, len(pinned))
+        return snapshot
+
+    # 3) cost of each strategy in requests
+    target = {key: d for d, key in enumerate(desired)}
+    # tracks already in the playlist that can stay put: a longest run already in target order
+    stable = _increasing_subsequence([target[i] for i in range(n)])
+    moves = [key for key in desired if key not in stable]
+
+    pin_idx = sorted(target[pos.get(uri, uri)] for uri in pinned)
+    runs: List[List[int]] = []
+    for d in pin_idx:
+        if runs and runs[-1][-1] == d - 1 and len(runs[-1]) < 100:
+            runs[-1].append(d)
         else:
-            # already exists: if not in right place — move
-            desired_idx = min(insert_before, len(uris))  # 0..n
-            if current_idx != desired_idx:
-                # In Spotify reorder: range_start=current_idx, insert_before=desired_idx, range_length=1
-                snapshot = sp.reorder(playlist_id, range_start=current_idx, insert_before=desired_idx, range_length=1, snapshot_id=snapshot)
-                logger.info("move: %s %d -> %d", uri, current_idx + 1, desired_idx + 1)
-            else:
-                logger.info("skip: %s already at position %d", uri, current_idx + 1)
+            runs.append([d])
+    removed = {uri: [pos[uri]] for uri in pinned if uri in pos}
+    batch_cost = (1 + (len(removed) - 1) // 100 if removed else 0) + len(runs)
+
+    def uri_of(key) -> str:
+        return key if isinstance(key, str) else uris[key]
+
+    if batch_cost < len(moves):
+        # 4a) take all pinned tracks out, then insert each run of consecutive targets at once
+        if removed:
+            snapshot = sp.remove_occurrences(playlist_id, removed, snapshot_id=snapshot)
+        for run in runs:
+            snapshot = sp.add_tracks(playlist_id, [uri_of(desired[d]) for d in run], position=run[0])
+            logger.info("insert: %s: %d pinned tracks -> pos %d-%d", playlist_name, len(run), run[0] + 1, run[-1] + 1)
+        logger.info("batch: %s synced with %d requests instead of %d moves", playlist_name, batch_cost, len(moves))
+        return snapshot
+
+    # 4b) move only the out-of-place tracks, in target order, each right after its predecessor
+    current: List = list(range(n))
+    for key in moves:
+        d = target[key]
+        at = current.index(desired[d - 1]) + 1 if d else 0
+        if isinstance(key, str):
+            snapshot = sp.add_tracks(playlist_id, [key], position=at)
+            current.insert(at, key)
+            logger.info("insert: %s: %s -> pos %d", playlist_name, key, at + 1)
+            continue
+        c = current.index(key)
+        # Spotify's insert_before counts positions before the track is taken out
+        insert_before = at
+        if at > c:
+            at -= 1
+        snapshot = sp.reorder(playlist_id, range_start=c, insert_before=insert_before, range_length=1, snapshot_id=snapshot)
+        current.insert(at, current.pop(c))
+        logger.info("move: %s: %s %d -> %d", playlist_name, uris[key], c + 1, at + 1)
+    return snapshot
 
 # ---------- CLI Commands ----------
 
 
 
-def cmd_pin_list(args):
-    # Determine which playlist to use
+def _resolve_playlist(args) -> Tuple[str, Dict, Optional[str]]:
+    """(playlist_name, config, playlist_id) for --playlist, or the default playlist."""
     if args.playlist:
-        # Use specific playlist name
         playlist_name = args.playlist
         config = load_playlist_config(playlist_name)
         playlist_id = config.get("playlist_id")
         if not playlist_id:
             die(f"Playlist '{playlist_name}' not found. Create it first with 'playlist-create'.")
     else:
-        # Use default playlist
         registry = load_playlists_registry()
         if not registry["default"]:
             die("No default playlist set. Create one with 'playlist-create' or specify --playlist.")
         playlist_name = registry["default"]
         config = load_playlist_config(playlist_name)
         playlist_id = config.get("playlist_id")
+    return playlist_name, config, playlist_id
+
+def cmd_pin_list(args):
+    playlist_name, config, playlist_id = _resolve_playlist(args)
     
     pins = sorted(config.get("pins", []), key=lambda p: int(p["position"]))
     if not pins:
@@ -448,28 +738,16 @@ def cmd_pin_list(args):
         print(f"{i:2d} {position:4d} {track_name}")
 
 def cmd_pin_add(args):
-    # Determine which playlist to use
-    if args.playlist:
-        playlist_name = args.playlist
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
-        if not playlist_id:
-            die(f"Playlist '{playlist_name}' not found. Create it first with 'playlist-create'.")
-    else:
-        registry = load_playlists_registry()
-        if not registry["default"]:
-            die("No default playlist set. Create one with 'playlist-create' or specify --playlist.")
-        playlist_name = registry["default"]
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
+    playlist_name, config, playlist_id = _resolve_playlist(args)
 
     track = args.track or input("Paste track link/ID: ").strip()
     uri = normalize_track_id(track)
-    pos = args.position or int(input("Position (1-based): ").strip())
+    pos = int(args.position or input("Position (1-based): ").strip())
 
     # check for conflicts
     pins = config.get("pins", [])
-    conflict = next((p for p in pins if int(p["position"]) == int(pos) and normalize_track_id(p["track_id"]) != uri), None)
+    # cheap int compare first; only pins at this position get their track ID normalized
+    conflict = next((p for p in pins if int(p["position"]) == pos and normalize_track_id(p["track_id"]) != uri), None)
     if conflict:
         print(f"⚠️ Position {pos} already pinned: {normalize_track_id(conflict['track_id'])}")
         if not args.confirm:
@@ -478,50 +756,31 @@ def cmd_pin_add(args):
                 print("Cancelled.")
                 return
         # replace mode: remove previous PIN at this position
-        pins = [p for p in pins if int(p["position"]) != int(pos)]
+        pins = [p for p in pins if int(p["position"]) != pos]
 
     # Get track name from Spotify
     sp = SpotifyClient()
     track_spotify_id = uri.split(":")[-1]
     try:
-        resp = sp._req("GET", f"/tracks/{track_spotify_id}")
-        if resp.status_code == 200:
-            track_data = resp.json()
-            track_name = track_data.get("name", "Unknown")
-            artists = ", ".join([artist["name"] for artist in track_data.get("artists", [])])
-            full_track_name = f"{track_name} - {artists}" if artists else track_name
-        else:
-            full_track_name = "Unknown Track"
+        track_data = sp.get_tracks([track_spotify_id]).get(track_spotify_id)
+        full_track_name = track_display_name(track_data) if track_data else "Unknown Track"
     except Exception:
         full_track_name = "Unknown Track"
 
     # if PIN already exists for this track — update position
     existed = next((p for p in pins if normalize_track_id(p["track_id"]) == uri), None)
     if existed:
-        existed["position"] = int(pos)
+        existed["position"] = pos
         existed["track_name"] = full_track_name
     else:
-        pins.append({"track_id": uri, "position": int(pos), "track_name": full_track_name})
+        pins.append({"track_id": uri, "position": pos, "track_name": full_track_name})
 
     config["pins"] = pins
     save_playlist_config(playlist_name, config)
     print(f"✅ Pinned: {uri} at position {pos} (playlist {playlist_name})")
 
 def cmd_pin_remove(args):
-    # Determine which playlist to use
-    if args.playlist:
-        playlist_name = args.playlist
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
-        if not playlist_id:
-            die(f"Playlist '{playlist_name}' not found. Create it first with 'playlist-create'.")
-    else:
-        registry = load_playlists_registry()
-        if not registry["default"]:
-            die("No default playlist set. Create one with 'playlist-create' or specify --playlist.")
-        playlist_name = registry["default"]
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
+    playlist_name, config, playlist_id = _resolve_playlist(args)
 
     track = args.track or input("Paste track link/ID to remove PIN: ").strip()
     uri = normalize_track_id(track)
@@ -536,24 +795,11 @@ def cmd_pin_remove(args):
         print(f"✅ Removed PIN: {uri}")
 
 def cmd_pin_move(args):
-    # Determine which playlist to use
-    if args.playlist:
-        playlist_name = args.playlist
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
-        if not playlist_id:
-            die(f"Playlist '{playlist_name}' not found. Create it first with 'playlist-create'.")
-    else:
-        registry = load_playlists_registry()
-        if not registry["default"]:
-            die("No default playlist set. Create one with 'playlist-create' or specify --playlist.")
-        playlist_name = registry["default"]
-        config = load_playlist_config(playlist_name)
-        playlist_id = config.get("playlist_id")
+    playlist_name, config, playlist_id = _resolve_playlist(args)
 
     track = args.track or input("Track (link/ID) to move: ").strip()
     uri = normalize_track_id(track)
-    pos = args.position or int(input("New position (1-based): ").strip())
+    pos = int(args.position or input("New position (1-based): ").strip())
 
     pins = config.get("pins", [])
     pin = next((p for p in pins if normalize_track_id(p["track_id"]) == uri), None)
@@ -561,7 +807,8 @@ def cmd_pin_move(args):
         die("This track has no PIN — add it first with `pin add`.")
     
     # position conflict
-    conflict = next((p for p in pins if int(p["position"]) == int(pos) and normalize_track_id(p["track_id"]) != uri), None)
+    # cheap int compare first; only pins at this position get their track ID normalized
+    conflict = next((p for p in pins if int(p["position"]) == pos and normalize_track_id(p["track_id"]) != uri), None)
     if conflict:
         print(f"⚠️ Position {pos} already pinned: {normalize_track_id(conflict['track_id'])}")
         if not args.confirm:
@@ -571,21 +818,15 @@ def cmd_pin_move(args):
                 return
         pins = [p for p in pins if p is not conflict]
 
-    pin["position"] = int(pos)
+    pin["position"] = pos
     # Ensure track_name is preserved
     if "track_name" not in pin:
         # Get track name from Spotify if missing
         sp = SpotifyClient()
         track_spotify_id = uri.split(":")[-1]
         try:
-            resp = sp._req("GET", f"/tracks/{track_spotify_id}")
-            if resp.status_code == 200:
-                track_data = resp.json()
-                track_name = track_data.get("name", "Unknown")
-                artists = ", ".join([artist["name"] for artist in track_data.get("artists", [])])
-                pin["track_name"] = f"{track_name} - {artists}" if artists else track_name
-            else:
-                pin["track_name"] = "Unknown Track"
+            track_data = sp.get_tracks([track_spotify_id]).get(track_spotify_id)
+            pin["track_name"] = track_display_name(track_data) if track_data else "Unknown Track"
         except Exception:
             pin["track_name"] = "Unknown Track"
     
@@ -593,23 +834,36 @@ def cmd_pin_move(args):
     save_playlist_config(playlist_name, config)
     print(f"✅ Moved PIN: {uri} → position {pos}")
 
+SYNC_WORKERS = 4
+
+def sync_playlist_by_name(playlist_name: str, sp: Optional[SpotifyClient] = None):
+    """Loads one playlist config and syncs it (own client unless one is passed)."""
+    sp = sp or SpotifyClient()
+    config = load_playlist_config(playlist_name)
+    backfill_track_names(sp, playlist_name, config)
+    snapshot_id = sync_playlist_new(sp, config)
+    # remember what was synced so the next run can skip an unchanged playlist
+    config_hash = pins_hash(config)
+    prev = config.get("last_sync") or {}
+    if snapshot_id and (prev.get("snapshot_id"), prev.get("config_hash")) != (snapshot_id, config_hash):
+        config["last_sync"] = {"snapshot_id": snapshot_id, "timestamp": int(time.time()), "config_hash": config_hash}
+        save_playlist_config(playlist_name, config)
+
 def cmd_sync(args):
-    sp = SpotifyClient()
     registry = load_playlists_registry()
     
     if args.playlist:
         # Sync specific playlist
         if args.playlist not in registry["playlists"]:
             die(f"Playlist '{args.playlist}' not found. Create it first with 'playlist-create'.")
-        config = load_playlist_config(args.playlist)
-        sync_playlist_new(sp, config)
+        sync_playlist_by_name(args.playlist)
     else:
-        # Sync all playlists
+        # Sync all playlists, a few at a time. Each worker uses its own client
+        # (and connection pool); 429 backoff is shared between them.
         if not registry["playlists"]:
             die("No playlists configured. Create one first with 'playlist-create'.")
-        for playlist_name in registry["playlists"]:
-            config = load_playlist_config(playlist_name)
-            sync_playlist_new(sp, config)
+        with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as executor:
+            list(executor.map(sync_playlist_by_name, registry["playlists"]))
 
 def cmd_playlist_create(args):
     """Create a new playlist configuration."""
@@ -636,8 +890,7 @@ def cmd_playlist_create(args):
     playlist_name = chosen_playlist.get("name", "Unknown")
     
     # Create safe filename from playlist name
-    safe_name = "".join(c for c in playlist_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    safe_name = safe_name.replace(' ', '_').lower()
+    safe_name = safe_playlist_name(playlist_name)
     
     # Check if already exists
     registry = load_playlists_registry()
@@ -692,24 +945,31 @@ def cmd_playlist_list(args):
         print(f"   Created: {info['created']}")
         print()
 
+def choose_playlist(registry: Dict, prompt: str, default_marker: str) -> str:
+    """Numbered menu of managed playlists; returns the chosen name (the only one, if there is one)."""
+    items = list(registry["playlists"].items())
+    if len(items) == 1:
+        print(f"Only one playlist configured: {items[0][0]}")
+        return items[0][0]
+
+    print("Available playlists:")
+    for i, (name, info) in enumerate(items, 1):
+        marker = default_marker if name == registry["default"] else ""
+        print(f"{i:2d}. {name} — {info['display_name']}{marker}")
+
+    sel = input(prompt).strip()
+    idx = int(sel) - 1
+    if idx < 0 or idx >= len(items):
+        die("Invalid choice.")
+    return items[idx][0]
+
 def cmd_playlist_set_default(args):
     """Set default playlist."""
     registry = load_playlists_registry()
     if not registry["playlists"]:
         die("No playlists configured. Create one first with 'playlist-create'.")
     
-    print("Available playlists:")
-    for i, (name, info) in enumerate(registry["playlists"].items(), 1):
-        default_marker = " (CURRENT DEFAULT)" if name == registry["default"] else ""
-        print(f"{i:2d}. {name} — {info['display_name']}{default_marker}")
-    
-    sel = input("Choose playlist number: ").strip()
-    idx = int(sel) - 1
-    playlist_names = list(registry["playlists"].keys())
-    if idx < 0 or idx >= len(playlist_names):
-        die("Invalid choice.")
-    
-    chosen_name = playlist_names[idx]
+    chosen_name = choose_playlist(registry, "Choose playlist number: ", " (CURRENT DEFAULT)")
     registry["default"] = chosen_name
     save_playlists_registry(registry)
     print(f"✅ Set default playlist: {chosen_name}")
@@ -720,18 +980,7 @@ def cmd_playlist_delete(args):
     if not registry["playlists"]:
         die("No playlists configured.")
     
-    print("Available playlists:")
-    for i, (name, info) in enumerate(registry["playlists"].items(), 1):
-        default_marker = " (DEFAULT)" if name == registry["default"] else ""
-        print(f"{i:2d}. {name} — {info['display_name']}{default_marker}")
-    
-    sel = input("Choose playlist number to delete: ").strip()
-    idx = int(sel) - 1
-    playlist_names = list(registry["playlists"].keys())
-    if idx < 0 or idx >= len(playlist_names):
-        die("Invalid choice.")
-    
-    chosen_name = playlist_names[idx]
+    chosen_name = choose_playlist(registry, "Choose playlist number to delete: ", " (DEFAULT)")
     print(f"⚠️ This will delete playlist '{chosen_name}' and its configuration!")
     ans = input("Are you sure? [y/N]: ").lower().strip()
     if ans != "y":
@@ -749,7 +998,7 @@ def cmd_playlist_delete(args):
     
     # Update default if needed
     if registry["default"] == chosen_name:
-        registry["default"] = list(registry["playlists"].keys())[0] if registry["playlists"] else None
+        registry["default"] = next(iter(registry["playlists"]), None)
         if registry["default"]:
             print(f"✅ Set new default: {registry['default']}")
     
@@ -781,8 +1030,7 @@ def cmd_select_playlist(args):
     playlist_name = chosen_playlist.get("name", "Unknown")
     
     # Create safe filename from playlist name
-    safe_name = "".join(c for c in playlist_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    safe_name = safe_name.replace(' ', '_').lower()
+    safe_name = safe_playlist_name(playlist_name)
     
     # Check if already exists
     registry = load_playlists_registry()
@@ -822,7 +1070,10 @@ def cmd_select_playlist(args):
 
 def cmd_track_select(args):
     """Interactive track selection for pinning."""
-    if track_select is None:
+    # Imported here so other commands don't pay for loading it
+    try:
+        from track_select import track_select
+    except ImportError:
         die("Track selection module not available. Make sure track_select.py is in the same directory.")
     
     # Determine which playlist to use
@@ -841,11 +1092,14 @@ def cmd_track_select(args):
         die(f"Playlist '{playlist_name}' not found. Create it first with 'playlist-create'.")
     
     # Start interactive track selection
-    track_select(playlist_name)
+    track_select(playlist_name, hide_pinned=args.hide_pinned)
 
 def cmd_track_search(args):
     """Interactive track search and pinning."""
-    if track_search is None:
+    # Imported here so other commands don't pay for loading it
+    try:
+        from track_search import track_search
+    except ImportError:
         die("Track search module not available. Make sure track_search.py is in the same directory.")
     
     # Determine which playlist to use
@@ -868,7 +1122,10 @@ def cmd_track_search(args):
 
 def cmd_export_csv(args):
     """Export playlist tracks to CSV format."""
-    if export_playlist_to_csv is None:
+    # Imported here so other commands don't pay for loading it
+    try:
+        from csv_export import export_playlist_to_csv
+    except ImportError:
         die("CSV export module not available. Make sure csv_export.py is in the same directory.")
     
     # Determine which playlist to use
@@ -967,75 +1224,67 @@ def cmd_sort_pins(args):
 
 # ---------- main ----------
 
-def build_parser():
-    p = argparse.ArgumentParser(description="Spotify playlist pins")
-    sub = p.add_subparsers(dest="cmd", required=True)
-
-
-    sp_list = sub.add_parser("pin-list", help="Show pins for playlist")
-    sp_list.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_list.set_defaults(func=cmd_pin_list)
-
-    sp_add = sub.add_parser("pin-add", help="Add/update PIN")
-    sp_add.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_add.add_argument("--track", help="Track ID/URL")
-    sp_add.add_argument("--position", type=int, help="Position 1-based")
-    sp_add.add_argument("--confirm", action="store_true", help="Don't ask questions (yes)")
-    sp_add.set_defaults(func=cmd_pin_add)
-
-    sp_rm = sub.add_parser("pin-remove", help="Remove PIN from track")
-    sp_rm.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_rm.add_argument("--track", help="Track ID/URL")
-    sp_rm.set_defaults(func=cmd_pin_remove)
-
-    sp_mv = sub.add_parser("pin-move", help="Move PIN to different position")
-    sp_mv.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_mv.add_argument("--track", help="Track ID/URL")
-    sp_mv.add_argument("--position", type=int, help="New position 1-based")
-    sp_mv.add_argument("--confirm", action="store_true", help="Don't ask questions (yes)")
-    sp_mv.set_defaults(func=cmd_pin_move)
-
-    sp_sync = sub.add_parser("sync", help="Apply pins to playlists")
-    sp_sync.add_argument("--playlist", help="Playlist name (if not set — all managed playlists)")
-    sp_sync.set_defaults(func=cmd_sync)
-
+PLAYLIST_ARG = (("--playlist",), {"help": "Playlist name (if not set — default)"})
+CONFIRM_ARG = (("--confirm",), {"action": "store_true", "help": "Don't ask questions (yes)"})
+TRACK_ARG = (("--track",), {"help": "Track ID/URL"})
+
+# (flags, add_argument keyword arguments)
+CommandArg = Tuple[Tuple[str, ...], Dict[str, Any]]
+
+# command -> (help, handler, arguments)
+COMMANDS: Dict[str, Tuple[str, Callable[[argparse.Namespace], None], List[CommandArg]]] = {
+    "pin-list": ("Show pins for playlist", cmd_pin_list, [PLAYLIST_ARG]),
+    "pin-add": ("Add/update PIN", cmd_pin_add, [
+        PLAYLIST_ARG, TRACK_ARG,
+        (("--position",), {"type": int, "help": "Position 1-based"}),
+        CONFIRM_ARG,
+    ]),
+    "pin-remove": ("Remove PIN from track", cmd_pin_remove, [PLAYLIST_ARG, TRACK_ARG]),
+    "pin-move": ("Move PIN to different position", cmd_pin_move, [
+        PLAYLIST_ARG, TRACK_ARG,
+        (("--position",), {"type": int, "help": "New position 1-based"}),
+        CONFIRM_ARG,
+    ]),
+    "sync": ("Apply pins to playlists", cmd_sync, [
+        (("--playlist",), {"help": "Playlist name (if not set — all managed playlists)"}),
+    ]),
     # Playlist management commands
-    sp_create = sub.add_parser("playlist-create", help="Create new playlist configuration")
-    sp_create.set_defaults(func=cmd_playlist_create)
-
-    sp_select = sub.add_parser("select-playlist", help="Select a playlist from your owned playlists")
-    sp_select.set_defaults(func=cmd_select_playlist)
-
-    sp_list = sub.add_parser("playlist-list", help="List all managed playlists")
-    sp_list.set_defaults(func=cmd_playlist_list)
-
-    sp_default = sub.add_parser("playlist-set-default", help="Set default playlist")
-    sp_default.set_defaults(func=cmd_playlist_set_default)
-
-    sp_delete = sub.add_parser("playlist-delete", help="Delete playlist configuration")
-    sp_delete.set_defaults(func=cmd_playlist_delete)
-
-    # Track selection command
-    sp_track_select = sub.add_parser("track-select", help="Interactive track selection for pinning")
-    sp_track_select.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_track_select.set_defaults(func=cmd_track_select)
-
-    # Track search command
-    sp_track_search = sub.add_parser("track-search", help="Search Spotify tracks and pin them")
-    sp_track_search.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_track_search.set_defaults(func=cmd_track_search)
-
+    "playlist-create": ("Create new playlist configuration", cmd_playlist_create, []),
+    "select-playlist": ("Select a playlist from your owned playlists", cmd_select_playlist, []),
+    "playlist-list": ("List all managed playlists", cmd_playlist_list, []),
+    "playlist-set-default": ("Set default playlist", cmd_playlist_set_default, []),
+    "playlist-delete": ("Delete playlist configuration", cmd_playlist_delete, []),
+    # Interactive track commands
+    "track-select": ("Interactive track selection for pinning", cmd_track_select, [
+        PLAYLIST_ARG,
+        (("--hide-pinned",), {"action": "store_true", "help": "Only list tracks that are not pinned yet"}),
+    ]),
+    "track-search": ("Search Spotify tracks and pin them", cmd_track_search, [PLAYLIST_ARG]),
     # CSV export command
-    sp_export = sub.add_parser("export-csv", help="Export playlist tracks to CSV format")
-    sp_export.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_export.add_argument("--output", help="Output CSV file path (defaults to playlist_name_export.csv)")
-    sp_export.set_defaults(func=cmd_export_csv)
-
+    "export-csv": ("Export playlist tracks to CSV format", cmd_export_csv, [
+        PLAYLIST_ARG,
+        (("--output",), {"help": "Output CSV file path (defaults to playlist_name_export.csv)"}),
+    ]),
     # Sort pins command
-    sp_sort = sub.add_parser("sort-pins", help="Sort pins by position in playlist configuration")
-    sp_sort.add_argument("--playlist", help="Playlist name (if not set — default)")
-    sp_sort.add_argument("--all", action="store_true", help="Sort pins for all managed playlists")
-    sp_sort.set_defaults(func=cmd_sort_pins)
+    "sort-pins": ("Sort pins by position in playlist configuration", cmd_sort_pins, [
+        PLAYLIST_ARG,
+        (("--all",), {"action": "store_true", "help": "Sort pins for all managed playlists"}),
+    ]),
+}
+
+def build_parser(argv: Optional[List[str]] = None):
+    """Parser for the command in argv only; all commands if it's missing or unknown (help, errors)."""
+    argv = sys.argv[1:] if argv is None else argv
+    p = argparse.ArgumentParser(description="Spotify playlist pins")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    names = [argv[0]] if argv and argv[0] in COMMANDS else COMMANDS
+    for name in names:
+        help_text, func, arguments = COMMANDS[name]
+        sp = sub.add_parser(name, help=help_text)
+        for flags, kwargs in arguments:
+            sp.add_argument(*flags, **kwargs)
+        sp.set_defaults(func=func)
 
     return p
 
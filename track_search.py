@@ -12,11 +12,20 @@ Functions:
   - display_search_results() — Display search results with pagination
   - select_track_from_search() — Interactive track selection
   - handle_track_pinning()   — Handle pinning logic for existing/new tracks
+  - build_uri_index()        — Map playlist track URIs to positions
+
+Position selection and the preview prompt live in track_ui.py.
 """
 
 import sys
 from typing import Dict, List, Optional, Tuple
-from pin import SpotifyClient, load_playlist_config, save_playlist_config, normalize_track_id
+from pin import SpotifyClient, get_shared_client, load_playlist_config, save_playlist_config, normalize_track_id, track_display_name, pins_by_position, _json_loads
+from track_ui import get_page_selection, select_track_position, preview_changes
+
+
+# Search results table borders
+SEPARATOR = "=" * 90
+RULE = "-" * 90
 
 
 def search_spotify_tracks(sp: SpotifyClient, query: str, limit: int = 20) -> List[Dict]:
@@ -32,13 +41,10 @@ def search_spotify_tracks(sp: SpotifyClient, query: str, limit: int = 20) -> Lis
         List of track objects from Spotify API
     """
     try:
-        # URL encode the query
-        import urllib.parse
-        encoded_query = urllib.parse.quote(query)
-        
-        resp = sp._req("GET", f"/search?q={encoded_query}&type=track&limit={limit}")
+        # requests encodes the query string
+        resp = sp._req("GET", "/search", params={"q": query, "type": "track", "limit": limit})
         if resp.status_code == 200:
-            data = resp.json()
+            data = _json_loads(resp.content)
             return data.get("tracks", {}).get("items", [])
         else:
             print(f"❌ Search failed: {resp.status_code} {resp.text}")
@@ -65,66 +71,47 @@ def display_search_results(tracks: List[Dict], page: int = 0, page_size: int = 1
     end_idx = min(start_idx + page_size, len(tracks))
     page_tracks = tracks[start_idx:end_idx]
     
-    print(f"\n🔍 Search Results (Page {page + 1}/{(len(tracks) + page_size - 1) // page_size})")
-    print("=" * 90)
-    print(f"{'#':<3} {'Track Name - Artist':<60} {'Album':<25}")
-    print("-" * 90)
+    # Build the whole page and print it in one write
+    lines = [
+        f"\n🔍 Search Results (Page {page + 1}/{(len(tracks) + page_size - 1) // page_size})",
+        SEPARATOR,
+        f"{'#':<3} {'Track Name - Artist':<60} {'Album':<25}",
+        RULE,
+    ]
     
     for i, track in enumerate(page_tracks, start_idx + 1):
-        track_name = track.get('name', 'Unknown')
-        artists = ", ".join([artist.get('name', '') for artist in track.get('artists', [])])
+        full_name = track_display_name(track)
         album = track.get('album', {}).get('name', 'Unknown')
         
         # Truncate long names
-        full_name = f"{track_name} - {artists}" if artists else track_name
-        if len(full_name) > 57:
-            full_name = full_name[:54] + "..."
-        
-        if len(album) > 22:
-            album = album[:19] + "..."
+        full_name = full_name[:54] + "..." if len(full_name) > 57 else full_name
+        album = album[:19] + "..." if len(album) > 22 else album
         
-        print(f"{i:<3} {full_name:<60} {album:<25}")
+        lines.append(f"{i:<3} {full_name:<60} {album:<25}")
     
-    print("-" * 90)
-    print(f"Showing {start_idx + 1}-{end_idx} of {len(tracks)} results")
+    lines.append(RULE)
+    lines.append(f"Showing {start_idx + 1}-{end_idx} of {len(tracks)} results")
+    print("\n".join(lines))
 
 
-def get_search_selection(tracks: List[Dict], page: int = 0, page_size: int = 10) -> Optional[int]:
+def build_uri_index(playlist_tracks: List[Dict]) -> Dict[str, int]:
     """
-    Get track selection from search results.
+    Map track URIs to their playlist position, for repeated lookups.
     
     Args:
-        tracks: List of track objects
-        page: Current page number
-        page_size: Number of tracks per page
+        playlist_tracks: List of track items from get_playlist_items()
     
     Returns:
-        Selected track index (0-based) or None if cancelled
+        Dictionary mapping track URIs to their first position (0-based)
     """
-    start_idx = page * page_size
-    end_idx = min(start_idx + page_size, len(tracks))
-    
-    while True:
-        try:
-            choice = input(f"\nSelect track number ({start_idx + 1}-{end_idx}) or 'n' for next page, 'p' for previous, 'q' to quit: ").strip().lower()
-            
-            if choice == 'q':
-                return None
-            elif choice == 'n':
-                return 'next'
-            elif choice == 'p':
-                return 'prev'
-            else:
-                track_num = int(choice)
-                if start_idx + 1 <= track_num <= end_idx:
-                    return track_num - 1  # Convert to 0-based index
-                else:
-                    print(f"Please enter a number between {start_idx + 1} and {end_idx}")
-        except ValueError:
-            print("Please enter a valid number, 'n', 'p', or 'q'")
+    uri_index: Dict[str, int] = {}
+    for track_item in playlist_tracks:
+        uri_index.setdefault(track_item['uri'], track_item['position'])
+    return uri_index
 
 
-def check_track_in_playlist(sp: SpotifyClient, playlist_id: str, track_uri: str) -> Optional[int]:
+def check_track_in_playlist(sp: SpotifyClient, playlist_id: str, track_uri: str,
+                            uri_index: Optional[Dict[str, int]] = None) -> Optional[int]:
     """
     Check if a track exists in the playlist and return its current position.
     
@@ -132,12 +119,16 @@ def check_track_in_playlist(sp: SpotifyClient, playlist_id: str, track_uri: str)
         sp: Spotify client instance
         playlist_id: Playlist ID
         track_uri: Track URI to search for
+        uri_index: Optional prebuilt index from build_uri_index(); when given,
+            the playlist is not fetched
     
     Returns:
         Current position (0-based) if found, None if not found
     """
+    if uri_index is not None:
+        return uri_index.get(track_uri)
     try:
-        tracks, _ = sp.get_playlist_items(playlist_id)
+        tracks = sp.get_playlist_items(playlist_id)
         for i, track_item in enumerate(tracks):
             if track_item.get('uri') == track_uri:
                 return i
@@ -147,80 +138,9 @@ def check_track_in_playlist(sp: SpotifyClient, playlist_id: str, track_uri: str)
         return None
 
 
-def select_track_position(current_pins: List[Dict], total_tracks: int) -> int:
-    """
-    Interactive position selection with conflict detection.
-    
-    Args:
-        current_pins: List of current pins with positions
-        total_tracks: Total number of tracks in playlist
-    
-    Returns:
-        Selected position (1-based)
-    """
-    print(f"\n📍 Position Selection")
-    print("=" * 50)
-    
-    # Show current pin structure
-    pinned_positions = {int(pin['position']) for pin in current_pins}
-    print("Current pinned positions:")
-    for pos in sorted(pinned_positions):
-        print(f"  Position {pos}: 📌")
-    
-    print(f"\nAvailable positions: 1 to {total_tracks + 1}")
-    
-    while True:
-        try:
-            pos = int(input("Enter position (1-based): ").strip())
-            if 1 <= pos <= total_tracks + 1:
-                if pos in pinned_positions:
-                    print(f"⚠️ Position {pos} is already pinned!")
-                    confirm = input("Replace existing pin? [y/N]: ").lower().strip()
-                    if confirm == 'y':
-                        return pos
-                else:
-                    return pos
-            else:
-                print(f"Please enter a position between 1 and {total_tracks + 1}")
-        except ValueError:
-            print("Please enter a valid number")
-
-
-def preview_track_changes(track_info: Dict, position: int, playlist_name: str, is_existing: bool = False) -> bool:
-    """
-    Show preview of changes and get confirmation.
-    
-    Args:
-        track_info: Track information dict
-        position: Selected position
-        playlist_name: Name of the playlist
-        is_existing: Whether track already exists in playlist
-    
-    Returns:
-        True if user confirms, False otherwise
-    """
-    track_name = track_info.get('name', 'Unknown')
-    artists = ", ".join([artist.get('name', '') for artist in track_info.get('artists', [])])
-    
-    print(f"\n📋 Preview Changes")
-    print("=" * 50)
-    print(f"Track: {track_name} - {artists}")
-    print(f"Position: {position}")
-    print(f"Playlist: {playlist_name}")
-    
-    if is_existing:
-        print("Action: Move existing track to pinned position")
-    else:
-        print("Action: Add new track to playlist and pin")
-    
-    print("=" * 50)
-    
-    confirm = input("Proceed with this pin? [Y/n]: ").lower().strip()
-    return confirm != 'n'
-
-
 def handle_track_pinning(sp: SpotifyClient, playlist_id: str, track_info: Dict, position: int, 
-                        playlist_name: str, config: Dict) -> bool:
+                        playlist_name: str, config: Dict,
+                        uri_index: Optional[Dict[str, int]] = None, save: bool = True) -> bool:
     """
     Handle the pinning logic for a track.
     
@@ -231,6 +151,9 @@ def handle_track_pinning(sp: SpotifyClient, playlist_id: str, track_info: Dict,
         position: Selected position
         playlist_name: Name of the playlist
         config: Playlist configuration
+        uri_index: Optional prebuilt URI index of the playlist
+        save: Save the config right away; False leaves it to the caller,
+            which can then save several pins at once
     
     Returns:
         True if successful, False otherwise
@@ -241,16 +164,19 @@ def handle_track_pinning(sp: SpotifyClient, playlist_id: str, track_info: Dict,
         return False
     
     # Check if track exists in playlist
-    current_position = check_track_in_playlist(sp, playlist_id, track_uri)
+    current_position = check_track_in_playlist(sp, playlist_id, track_uri, uri_index)
     
-    # Create track name
-    track_name = track_info.get('name', 'Unknown')
-    artists = ", ".join([artist.get('name', '') for artist in track_info.get('artists', [])])
-    full_track_name = f"{track_name} - {artists}" if artists else track_name
+    # Create track name once; the preview and the pin reuse it
+    full_track_name = track_display_name(track_info)
     
     # Preview changes
     is_existing = current_position is not None
-    if not preview_track_changes(track_info, position, playlist_name, is_existing):
+    if is_existing:
+        action = "Move existing track to pinned position"
+    else:
+        action = "Add new track to playlist and pin"
+    if not preview_changes(track_info, position, playlist_name, full_track_name,
+                           action=action, prompt="Proceed with this pin?"):
         print("❌ Cancelled")
         return False
     
@@ -261,14 +187,14 @@ def handle_track_pinning(sp: SpotifyClient, playlist_id: str, track_info: Dict,
         'track_name': full_track_name
     }
     
-    # Remove any existing pin at this position
-    current_pins = config.get('pins', [])
-    current_pins = [p for p in current_pins if int(p['position']) != position]
-    current_pins.append(new_pin)
+    # Replace any existing pin at this position
+    current_pins = pins_by_position(config)
+    current_pins[position] = new_pin
     
-    # Save config
-    config['pins'] = current_pins
-    save_playlist_config(playlist_name, config)
+    # Update config; save now unless the caller batches saves
+    config['pins'] = list(current_pins.values())
+    if save:
+        save_playlist_config(playlist_name, config)
     
     if is_existing:
         print(f"✅ Pinned existing track: {full_track_name} at position {position}")
@@ -297,87 +223,104 @@ def track_search(playlist_name: str) -> None:
         print(f"❌ Playlist '{playlist_name}' not found!")
         return
     
-    # Get Spotify client
-    sp = SpotifyClient()
+    # Get Spotify client (shared, so its connections stay warm)
+    sp = get_shared_client()
     
     # Get current pins for position selection
-    current_pins = config.get('pins', [])
+    current_pins = pins_by_position(config)
+    
+    # Read the playlist once per session; its length only changes when a new
+    # track gets pinned, which is tracked locally below
+    print("📡 Loading playlist from Spotify...")
+    try:
+        playlist_tracks = sp.get_playlist_items(playlist_id)
+    except Exception as e:
+        print(f"❌ Error getting playlist info: {e}")
+        return
+    total_tracks = len(playlist_tracks)
+    uri_index = build_uri_index(playlist_tracks)
     
     print(f"📌 Currently pinned: {len(current_pins)} tracks")
     
-    while True:
-        # Get search query
-        query = input("\n🔍 Enter track name or artist to search (or 'q' to quit): ").strip()
-        
-        if query.lower() == 'q':
-            print("👋 Goodbye!")
-            break
-        
-        if not query:
-            print("❌ Please enter a search query")
-            continue
-        
-        print(f"🔍 Searching for: '{query}'...")
-        
-        # Search tracks
-        tracks = search_spotify_tracks(sp, query, limit=50)
-        
-        if not tracks:
-            print("❌ No tracks found. Try a different search term.")
-            continue
-        
-        print(f"✅ Found {len(tracks)} tracks")
-        
-        # Interactive browsing
-        page = 0
-        page_size = 10
-        
+    # Pins are saved once, when the session ends
+    dirty = False
+    try:
         while True:
-            # Display current page
-            display_search_results(tracks, page, page_size)
+            # Get search query
+            query = input("\n🔍 Enter track name or artist to search (or 'q' to quit): ").strip()
             
-            # Get selection
-            selection = get_search_selection(tracks, page, page_size)
-            
-            if selection is None:  # Quit
+            if query.lower() == 'q':
+                print("👋 Goodbye!")
                 break
-            elif selection == 'next':  # Next page
-                max_page = (len(tracks) + page_size - 1) // page_size - 1
-                if page < max_page:
-                    page += 1
-                else:
-                    print("📄 Already on last page!")
-            elif selection == 'prev':  # Previous page
-                if page > 0:
-                    page -= 1
-                else:
-                    print("📄 Already on first page!")
-            else:  # Track selected
-                selected_track = tracks[selection]
-                
-                # Get playlist info for position selection
-                try:
-                    playlist_tracks, _ = sp.get_playlist_items(playlist_id)
-                    total_tracks = len(playlist_tracks)
-                except Exception as e:
-                    print(f"❌ Error getting playlist info: {e}")
-                    break
-                
-                # Select position
-                position = select_track_position(current_pins, total_tracks)
+            
+            if not query:
+                print("❌ Please enter a search query")
+                continue
+            
+            print(f"🔍 Searching for: '{query}'...")
+            
+            # Search tracks
+            tracks = search_spotify_tracks(sp, query, limit=50)
+            
+            if not tracks:
+                print("❌ No tracks found. Try a different search term.")
+                continue
+            
+            print(f"✅ Found {len(tracks)} tracks")
+            
+            # Interactive browsing
+            page = 0
+            page_size = 10
+            
+            while True:
+                # Display current page
+                display_search_results(tracks, page, page_size)
                 
-                # Handle pinning
-                if handle_track_pinning(sp, playlist_id, selected_track, position, playlist_name, config):
-                    # Update current pins for next iteration
-                    current_pins = config.get('pins', [])
+                # Get selection
+                selection = get_page_selection(tracks, page, page_size)
                 
-                # Ask if user wants to search again
-                continue_search = input("\n🔍 Search for another track? [Y/n]: ").lower().strip()
-                if continue_search == 'n':
-                    print("👋 Goodbye!")
-                    return
-                else:
-                    break  # Break out of pagination loop to start new search
+                if selection is None:  # Quit
+                    break
+                elif selection == 'next':  # Next page
+                    max_page = (len(tracks) + page_size - 1) // page_size - 1
+                    if page < max_page:
+                        page += 1
+                    else:
+                        print("📄 Already on last page!")
+                elif selection == 'prev':  # Previous page
+                    if page > 0:
+                        page -= 1
+                    else:
+                        print("📄 Already on first page!")
+                elif isinstance(selection, int):  # Track selected
+                    selected_track = tracks[selection]
+                    
+                    # Select position
+                    position = select_track_position(current_pins, total_tracks)
+                    
+                    # Handle pinning
+                    if handle_track_pinning(sp, playlist_id, selected_track, position, playlist_name, config,
+                                            uri_index, save=False):
+                        dirty = True
+                        # Update current pins for next iteration
+                        current_pins = pins_by_position(config)
+                        # A new track will be added at its pinned position on the next sync
+                        track_uri = selected_track['uri']
+                        if track_uri not in uri_index:
+                            uri_index[track_uri] = position - 1
+                            total_tracks += 1
+                    
+                    # Ask if user wants to search again
+                    continue_search = input("\n🔍 Search for another track? [Y/n]: ").lower().strip()
+                    if continue_search == 'n':
+                        print("👋 Goodbye!")
+                        return
+                    else:
+                        break  # Break out of pagination loop to start new search
+    finally:
+        # Also runs on Ctrl+C, so confirmed pins are never lost
+        if dirty:
+            save_playlist_config(playlist_name, config)
 
 
 if __name__ == "__main__":
@@ -9,17 +9,23 @@ and select them for pinning to specific positions.
 Functions:
   - track_select()           — Main interactive track selection function
   - display_tracks_page()    — Display paginated tracks with current pins
-  - select_track_position()  — Interactive position selection
-  - preview_changes()        — Show pending changes before saving
+
+Position selection and the preview prompt live in track_ui.py.
 """
 
 import sys
-from typing import Dict, List, Optional, Tuple
-from pin import SpotifyClient, load_playlist_config, save_playlist_config, normalize_track_id
+from typing import Dict, List, Optional, Set, Tuple
+from pin import get_shared_client, load_playlist_config, save_playlist_config, normalize_track_id, track_display_name, pins_by_position
+from track_ui import get_page_selection, select_track_position, preview_changes
+
+
+# Track list table borders
+SEPARATOR = "=" * 80
+RULE = "-" * 80
 
 
 def display_tracks_page(tracks: List[Dict], page: int = 0, page_size: int = 20, 
-                       pinned_tracks: List[str] = None) -> None:
+                       pinned_tracks: Optional[Set[str]] = None) -> None:
     """
     Display a page of tracks with pagination info.
     
@@ -27,148 +33,51 @@ def display_tracks_page(tracks: List[Dict], page: int = 0, page_size: int = 20,
         tracks: List of track items from Spotify API
         page: Current page number (0-based)
         page_size: Number of tracks per page
-        pinned_tracks: List of track URIs that are already pinned
+        pinned_tracks: Set of track URIs that are already pinned
     """
     if pinned_tracks is None:
-        pinned_tracks = []
+        pinned_tracks = set()
     
     start_idx = page * page_size
     end_idx = min(start_idx + page_size, len(tracks))
     page_tracks = tracks[start_idx:end_idx]
     
-    print(f"\n📋 Tracks (Page {page + 1}/{(len(tracks) + page_size - 1) // page_size})")
-    print("=" * 80)
-    print(f"{'#':<3} {'Track Name - Artist':<50} {'Duration':<8} {'Status':<10}")
-    print("-" * 80)
+    # Build the whole page and print it in one write
+    lines = [
+        f"\n📋 Tracks (Page {page + 1}/{(len(tracks) + page_size - 1) // page_size})",
+        SEPARATOR,
+        f"{'#':<3} {'Track Name - Artist':<50} {'Duration':<8} {'Status':<10}",
+        RULE,
+    ]
     
     for i, track_item in enumerate(page_tracks, start_idx + 1):
         track = track_item.get('track', {})
-        track_name = track.get('name', 'Unknown')
-        artists = ", ".join([artist.get('name', '') for artist in track.get('artists', [])])
         duration_ms = track.get('duration_ms', 0)
-        duration_str = f"{duration_ms // 60000}:{(duration_ms % 60000) // 1000:02d}"
+        mins, rem = divmod(duration_ms, 60000)
+        duration_str = f"{mins}:{rem // 1000:02d}"
         
         # Truncate long track names
-        full_name = f"{track_name} - {artists}" if artists else track_name
-        if len(full_name) > 47:
-            full_name = full_name[:44] + "..."
+        full_name = track_display_name(track)
+        full_name = full_name[:44] + "..." if len(full_name) > 47 else full_name
         
         # Check if track is pinned
         track_uri = track_item.get('uri', '')
         status = "📌 PINNED" if track_uri in pinned_tracks else ""
         
-        print(f"{i:<3} {full_name:<50} {duration_str:<8} {status:<10}")
+        lines.append(f"{i:<3} {full_name:<50} {duration_str:<8} {status:<10}")
     
-    print("-" * 80)
-    print(f"Showing {start_idx + 1}-{end_idx} of {len(tracks)} tracks")
+    lines.append(RULE)
+    lines.append(f"Showing {start_idx + 1}-{end_idx} of {len(tracks)} tracks")
+    print("\n".join(lines))
 
 
-def get_track_selection(tracks: List[Dict], page: int = 0, page_size: int = 20) -> Optional[int]:
-    """
-    Get track selection from user.
-    
-    Args:
-        tracks: List of track items
-        page: Current page number
-        page_size: Number of tracks per page
-    
-    Returns:
-        Selected track index (0-based) or None if cancelled
-    """
-    start_idx = page * page_size
-    end_idx = min(start_idx + page_size, len(tracks))
-    
-    while True:
-        try:
-            choice = input(f"\nSelect track number ({start_idx + 1}-{end_idx}) or 'n' for next page, 'p' for previous, 'q' to quit: ").strip().lower()
-            
-            if choice == 'q':
-                return None
-            elif choice == 'n':
-                return 'next'
-            elif choice == 'p':
-                return 'prev'
-            else:
-                track_num = int(choice)
-                if start_idx + 1 <= track_num <= end_idx:
-                    return track_num - 1  # Convert to 0-based index
-                else:
-                    print(f"Please enter a number between {start_idx + 1} and {end_idx}")
-        except ValueError:
-            print("Please enter a valid number, 'n', 'p', or 'q'")
-
-
-def select_track_position(current_pins: List[Dict], total_tracks: int) -> int:
-    """
-    Interactive position selection with conflict detection.
-    
-    Args:
-        current_pins: List of current pins with positions
-        total_tracks: Total number of tracks in playlist
-    
-    Returns:
-        Selected position (1-based)
-    """
-    print(f"\n📍 Position Selection")
-    print("=" * 50)
-    
-    # Show current pin structure
-    pinned_positions = {int(pin['position']) for pin in current_pins}
-    print("Current pinned positions:")
-    for pos in sorted(pinned_positions):
-        print(f"  Position {pos}: 📌")
-    
-    print(f"\nAvailable positions: 1 to {total_tracks + 1}")
-    
-    while True:
-        try:
-            pos = int(input("Enter position (1-based): ").strip())
-            if 1 <= pos <= total_tracks + 1:
-                if pos in pinned_positions:
-                    print(f"⚠️ Position {pos} is already pinned!")
-                    confirm = input("Replace existing pin? [y/N]: ").lower().strip()
-                    if confirm == 'y':
-                        return pos
-                else:
-                    return pos
-            else:
-                print(f"Please enter a position between 1 and {total_tracks + 1}")
-        except ValueError:
-            print("Please enter a valid number")
-
-
-def preview_changes(track_info: Dict, position: int, playlist_name: str) -> bool:
-    """
-    Show preview of changes and get confirmation.
-    
-    Args:
-        track_info: Track information dict
-        position: Selected position
-        playlist_name: Name of the playlist
-    
-    Returns:
-        True if user confirms, False otherwise
-    """
-    track_name = track_info.get('name', 'Unknown')
-    artists = ", ".join([artist.get('name', '') for artist in track_info.get('artists', [])])
-    
-    print(f"\n📋 Preview Changes")
-    print("=" * 50)
-    print(f"Track: {track_name} - {artists}")
-    print(f"Position: {position}")
-    print(f"Playlist: {playlist_name}")
-    print("=" * 50)
-    
-    confirm = input("Add this pin? [Y/n]: ").lower().strip()
-    return confirm != 'n'
-
-
-def track_select(playlist_name: str) -> None:
+def track_select(playlist_name: str, hide_pinned: bool = False) -> None:
     """
     Main interactive track selection function.
     
     Args:
         playlist_name: Name of the playlist to work with
+        hide_pinned: Only list tracks that were not pinned when the session started
     """
     print(f"🎵 Interactive Track Selection for: {playlist_name}")
     print("=" * 60)
@@ -180,89 +89,100 @@ def track_select(playlist_name: str) -> None:
         print(f"❌ Playlist '{playlist_name}' not found!")
         return
     
-    # Get Spotify client
-    sp = SpotifyClient()
+    # Get Spotify client (shared, so its connections stay warm)
+    sp = get_shared_client()
     
     # Get playlist tracks
     print("📡 Loading tracks from Spotify...")
-    tracks, _ = sp.get_playlist_items(playlist_id)
+    tracks = sp.get_playlist_items(playlist_id)
     if not tracks:
         print("❌ No tracks found in playlist!")
         return
     
     # Get current pins
-    current_pins = config.get('pins', [])
-    pinned_tracks = [normalize_track_id(pin['track_id']) for pin in current_pins]
+    current_pins = pins_by_position(config)
+    pinned_tracks = {normalize_track_id(pin['track_id']) for pin in current_pins.values()}
     
     print(f"✅ Loaded {len(tracks)} tracks")
     print(f"📌 Currently pinned: {len(current_pins)} tracks")
     
-    # Interactive browsing
+    # Nothing left to pick when every track is already pinned. This needs the
+    # playlist itself: pins can name tracks that aren't in it yet, so comparing
+    # counts alone can't tell, and the fetch above can't be skipped.
+    unpinned = [track_item for track_item in tracks if track_item['uri'] not in pinned_tracks]
+    if not unpinned:
+        print("✅ All tracks in this playlist are already pinned!")
+        return
+    # Rows are numbered within the list being browsed
+    shown = unpinned if hide_pinned else tracks
+    
+    # Interactive browsing; pins are saved once, when the session ends
     page = 0
     page_size = 20
+    dirty = False
     
-    while True:
-        # Display current page
-        display_tracks_page(tracks, page, page_size, pinned_tracks)
-        
-        # Get selection
-        selection = get_track_selection(tracks, page, page_size)
-        
-        if selection is None:  # Quit
-            print("👋 Goodbye!")
-            break
-        elif selection == 'next':  # Next page
-            max_page = (len(tracks) + page_size - 1) // page_size - 1
-            if page < max_page:
-                page += 1
-            else:
-                print("📄 Already on last page!")
-        elif selection == 'prev':  # Previous page
-            if page > 0:
-                page -= 1
-            else:
-                print("📄 Already on first page!")
-        else:  # Track selected
-            selected_track_item = tracks[selection]
-            selected_track = selected_track_item['track']
-            track_uri = selected_track_item['uri']
+    try:
+        while True:
+            # Display current page
+            display_tracks_page(shown, page, page_size, pinned_tracks)
             
-            # Check if already pinned
-            if track_uri in pinned_tracks:
-                print(f"⚠️ This track is already pinned!")
-                continue
+            # Get selection
+            selection = get_page_selection(shown, page, page_size)
             
-            # Select position
-            position = select_track_position(current_pins, len(tracks))
-            
-            # Preview and confirm
-            if preview_changes(selected_track, position, playlist_name):
-                # Create track name
-                track_name = selected_track.get('name', 'Unknown')
-                artists = ", ".join([artist.get('name', '') for artist in selected_track.get('artists', [])])
-                full_track_name = f"{track_name} - {artists}" if artists else track_name
-                
-                # Add pin with track name
-                new_pin = {
-                    'track_id': track_uri,
-                    'position': position,
-                    'track_name': full_track_name
-                }
+            if selection is None:  # Quit
+                print("👋 Goodbye!")
+                break
+            elif selection == 'next':  # Next page
+                max_page = (len(shown) + page_size - 1) // page_size - 1
+                if page < max_page:
+                    page += 1
+                else:
+                    print("📄 Already on last page!")
+            elif selection == 'prev':  # Previous page
+                if page > 0:
+                    page -= 1
+                else:
+                    print("📄 Already on first page!")
+            elif isinstance(selection, int):  # Track selected
+                selected_track_item = shown[selection]
+                selected_track = selected_track_item['track']
+                track_uri = selected_track_item['uri']
                 
-                # Remove any existing pin at this position
-                current_pins = [p for p in current_pins if int(p['position']) != position]
-                current_pins.append(new_pin)
+                # Check if already pinned
+                if track_uri in pinned_tracks:
+                    print(f"⚠️ This track is already pinned!")
+                    continue
                 
-                # Save config
-                config['pins'] = current_pins
-                save_playlist_config(playlist_name, config)
+                # Select position
+                position = select_track_position(current_pins, len(tracks))
                 
-                print(f"✅ Pinned: {selected_track['name']} at position {position}")
+                # Create track name once; the preview and the pin reuse it
+                full_track_name = track_display_name(selected_track)
                 
-                # Update pinned tracks list for display
-                pinned_tracks.append(track_uri)
-            else:
-                print("❌ Cancelled")
+                # Preview and confirm
+                if preview_changes(selected_track, position, playlist_name, full_track_name):
+                    # Add pin with track name
+                    new_pin = {
+                        'track_id': track_uri,
+                        'position': position,
+                        'track_name': full_track_name
+                    }
+                    
+                    # Replace any existing pin at this position
+                    current_pins[position] = new_pin
+                    
+                    dirty = True
+                    print(f"✅ Pinned: {selected_track['name']} at position {position}")
+                    
+                    # Update pinned tracks for display
+                    pinned_tracks.add(track_uri)
+                else:
+                    print("❌ Cancelled")
+    finally:
+        # Also runs on Ctrl+C, so confirmed pins are never lost
+        if dirty:
+            config['pins'] = list(current_pins.values())
+            save_playlist_config(playlist_name, config)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+track_ui.py — Interactive prompts shared by track selection and track search.
+
+Functions:
+  - get_page_selection()     — Pick an item on a page, or page through the list
+  - select_track_position()  — Interactive position selection
+  - preview_changes()        — Show pending changes and ask for confirmation
+"""
+
+from typing import Dict, List, Optional, Union
+from pin import track_display_name
+
+
+# Preview and position prompt borders
+BANNER = "=" * 50
+
+
+def get_page_selection(items: List[Dict], page: int = 0, page_size: int = 20) -> Optional[Union[int, str]]:
+    """
+    Get an item selection from the current page.
+
+    Args:
+        items: List of tracks being browsed
+        page: Current page number
+        page_size: Number of items per page
+
+    Returns:
+        Selected item index (0-based), 'next' or 'prev' to change page,
+        or None if cancelled
+    """
+    start_idx = page * page_size
+    end_idx = min(start_idx + page_size, len(items))
+
+    while True:
+        try:
+            choice = input(f"\nSelect track number ({start_idx + 1}-{end_idx}) or 'n' for next page, 'p' for previous, 'q' to quit: ").strip().lower()
+
+            if choice == 'q':
+                return None
+            elif choice == 'n':
+                return 'next'
+            elif choice == 'p':
+                return 'prev'
+            else:
+                track_num = int(choice)
+                if start_idx + 1 <= track_num <= end_idx:
+                    return track_num - 1  # Convert to 0-based index
+                else:
+                    print(f"Please enter a number between {start_idx + 1} and {end_idx}")
+        except ValueError:
+            print("Please enter a valid number, 'n', 'p', or 'q'")
+
+
+def select_track_position(current_pins: Dict[int, Dict], total_tracks: int) -> int:
+    """
+    Interactive position selection with conflict detection.
+
+    Args:
+        current_pins: Current pins keyed by position (see pins_by_position())
+        total_tracks: Total number of tracks in playlist
+
+    Returns:
+        Selected position (1-based)
+    """
+    print(f"\n📍 Position Selection")
+    print(BANNER)
+
+    # Show current pin structure
+    pinned_positions = current_pins.keys()
+    print("Current pinned positions:")
+    for pos in sorted(pinned_positions):
+        print(f"  Position {pos}: 📌")
+
+    print(f"\nAvailable positions: 1 to {total_tracks + 1}")
+
+    while True:
+        try:
+            pos = int(input("Enter position (1-based): ").strip())
+            if 1 <= pos <= total_tracks + 1:
+                if pos in pinned_positions:
+                    print(f"⚠️ Position {pos} is already pinned!")
+                    confirm = input("Replace existing pin? [y/N]: ").lower().strip()
+                    if confirm == 'y':
+                        return pos
+                else:
+                    return pos
+            else:
+                print(f"Please enter a position between 1 and {total_tracks + 1}")
+        except ValueError:
+            print("Please enter a valid number")
+
+
+def preview_changes(track_info: Dict, position: int, playlist_name: str,
+                    full_name: Optional[str] = None, action: Optional[str] = None,
+                    prompt: str = "Add this pin?") -> bool:
+    """
+    Show preview of changes and get confirmation.
+
+    Args:
+        track_info: Track information dict
+        position: Selected position
+        playlist_name: Name of the playlist
+        full_name: Track display name, if the caller already built it
+        action: Optional description of what the pin will do to the playlist
+        prompt: Confirmation question
+
+    Returns:
+        True if user confirms, False otherwise
+    """
+    if full_name is None:
+        full_name = track_display_name(track_info)
+
+    lines = [
+        f"\n📋 Preview Changes",
+        BANNER,
+        f"Track: {full_name}",
+        f"Position: {position}",
+        f"Playlist: {playlist_name}",
+    ]
+    if action:
+        lines.append(f"Action: {action}")
+    lines.append(BANNER)
+    print("\n".join(lines))
+
+    confirm = input(f"{prompt} [Y/n]: ").lower().strip()
+    return confirm != 'n'